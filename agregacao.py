@@ -0,0 +1,367 @@
+"""Motor de agregação em passada única: códigos de grupo fatorizados + reduções com np.bincount.
+
+O estado é um dicionário simples de arrays (somas, somas de quadrados e contagens por grupo,
+co-momentos para a correlação, histogramas finos de receita e preço e o resumo top-K de termos
+dos reviews). Todas as partes são
+mescláveis, então o estado pode ser alimentado com o dataset inteiro, bloco a bloco ou apenas com
+as linhas acrescentadas desde a última execução (modo incremental).
+"""
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from carregamento import ARQUIVO_LIMPO, TAMANHO_BLOCO_PADRAO, ler_em_blocos, fim_linhas_completas, faixa_desconto
+from sentimento import COLUNAS_REVIEWS, pontuar_reviews, novo_resumo_termos, atualizar_termos
+
+# As contagens de sentimento por produto (Pergunta 5) entram como colunas somáveis
+COLUNAS_AGREGADAS = ['Receita_Estimada', 'Qtd_Vendidos_Numeric', 'Preço', 'Nota',
+                     'Sentimento_Positivo', 'Sentimento_Negativo']
+GRUPOS = ['Marca', 'Material', 'Temporada', 'Faixa_Desconto']
+LIMIAR_SATISFACAO = 4.5
+
+# Variáveis do mapa de correlação (Pergunta 8), acumuladas como co-momentos
+COLUNAS_CORRELACAO = ['Nota', 'N_Avaliações', 'Desconto', 'Preço', 'Qtd_Vendidos_Numeric',
+                      'Receita_Estimada', 'Preço_Final']
+
+# Histogramas finos com bordas fixas em escala log (~0,7% de largura relativa por faixa): dão a
+# curva ABC e as faixas de preço sem guardar as linhas. O primeiro intervalo cobre [0, 0,01).
+BORDAS_HISTOGRAMA = np.concatenate([[0.0], np.logspace(-2, 10, 4097)])
+HISTOGRAMAS = {
+    'Receita_Estimada': ['Receita_Estimada'],
+    'Preço': ['Preço', 'Qtd_Vendidos_Numeric', 'Receita_Estimada'],
+}
+
+# Colunas que o estado precisa ler do CSV nos modos em blocos e incremental
+COLUNAS_ESTADO = list(dict.fromkeys(
+    ['Desconto', *COLUNAS_AGREGADAS[:4], *COLUNAS_CORRELACAO, *COLUNAS_REVIEWS,
+     *[g for g in GRUPOS if g != 'Faixa_Desconto']]))
+
+ARQUIVO_ESTADO = 'estado_incremental.pkl'
+VERSAO_ESTADO = 3
+_BYTES_ASSINATURA = 64 * 1024
+
+# Tabela de cada grupo no formato esperado pelas perguntas: coluna -> 'sum' | 'mean' | 'std'
+TABELAS = {
+    'Marca': {'Receita_Estimada': 'sum', 'Qtd_Vendidos_Numeric': 'sum', 'Preço': 'mean', 'Nota': 'mean'},
+    'Material': {'Preço': 'mean', 'Nota': 'mean', 'Qtd_Vendidos_Numeric': 'sum'},
+    'Temporada': {'Receita_Estimada': 'sum', 'Qtd_Vendidos_Numeric': 'sum', 'Preço': 'mean'},
+    'Faixa_Desconto': {'Receita_Estimada': 'sum'},
+    'Faixa_Preço_Detalhada': {'Qtd_Vendidos_Numeric': 'sum', 'Receita_Estimada': 'sum'},
+}
+
+
+def novo_estado():
+    return {'versao': VERSAO_ESTADO, 'linhas': 0, 'globais': {}, 'grupos': {}, 'histogramas': {},
+            'comomentos': {'colunas': [], 'n': 0, 'media': None, 'm2': None},
+            'termos': novo_resumo_termos()}
+
+
+def _codigos(serie):
+    # Categóricos ordenados (faixas) mantêm a ordem e as faixas vazias; demais colunas são fatorizadas
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), list(serie.cat.categories), serie.cat.ordered
+    codigos, rotulos = pd.factorize(serie)
+    return codigos, list(rotulos), False
+
+
+def _somar(atual, novo):
+    # Soma arrays por grupo, estendendo o acumulado quando surgem grupos novos
+    if atual is None:
+        return novo
+    return np.concatenate([atual, np.zeros(len(novo) - len(atual))]) + novo
+
+
+def _acumular_grupo(estado_grupo, codigos_locais, rotulos_locais, valores):
+    # Traduz os códigos do bloco para posições globais, criando rótulos novos quando necessário
+    indice = estado_grupo['indice']
+    posicoes = np.empty(len(rotulos_locais), dtype=np.intp)
+    for i, rotulo in enumerate(rotulos_locais):
+        if rotulo not in indice:
+            indice[rotulo] = len(estado_grupo['rotulos'])
+            estado_grupo['rotulos'].append(rotulo)
+        posicoes[i] = indice[rotulo]
+    k = len(estado_grupo['rotulos'])
+
+    validos = codigos_locais >= 0
+    codigos = posicoes[codigos_locais[validos]]
+
+    estado_grupo['n'] = _somar(estado_grupo['n'], np.bincount(codigos, minlength=k))
+    for coluna, v in valores.items():
+        v = v[validos]
+        presentes = ~np.isnan(v)
+        c, v = codigos[presentes], v[presentes]
+        for chave, parcial in (('soma', np.bincount(c, weights=v, minlength=k)),
+                               ('soma_q', np.bincount(c, weights=v * v, minlength=k)),
+                               ('contagem', np.bincount(c, minlength=k))):
+            estado_grupo[chave][coluna] = _somar(estado_grupo[chave].get(coluna), parcial)
+
+
+def _acumular_comomentos(comomentos, bloco):
+    # Média e matriz de co-momentos (M2) mescladas pela fórmula de Chan et al.; linhas incompletas saem
+    colunas = [c for c in COLUNAS_CORRELACAO if c in bloco.columns]
+    if not colunas or (comomentos['colunas'] and comomentos['colunas'] != colunas):
+        return
+    x = bloco[colunas].to_numpy(dtype='float64', na_value=np.nan)
+    x = x[~np.isnan(x).any(axis=1)]
+    n_b = len(x)
+    if not n_b:
+        return
+    media_b = x.mean(axis=0)
+    centrado = x - media_b
+    m2_b = centrado.T @ centrado
+    n_a = comomentos['n']
+    if n_a == 0:
+        comomentos.update({'colunas': colunas, 'n': n_b, 'media': media_b, 'm2': m2_b})
+        return
+    n = n_a + n_b
+    delta = media_b - comomentos['media']
+    comomentos['media'] = comomentos['media'] + delta * n_b / n
+    comomentos['m2'] = comomentos['m2'] + m2_b + np.outer(delta, delta) * n_a * n_b / n
+    comomentos['n'] = n
+
+
+def _acumular_histograma(estado, coluna, valores):
+    v = valores[coluna]
+    presentes = ~np.isnan(v)
+    faixas = np.clip(np.searchsorted(BORDAS_HISTOGRAMA, v[presentes], side='right') - 1,
+                     0, len(BORDAS_HISTOGRAMA) - 2)
+    k = len(BORDAS_HISTOGRAMA) - 1
+    histograma = estado['histogramas'].setdefault(coluna, {'contagem': np.zeros(k), 'soma': {}})
+    histograma['contagem'] += np.bincount(faixas, minlength=k)
+    for somada in HISTOGRAMAS[coluna]:
+        if somada not in valores:
+            continue
+        pesos = np.nan_to_num(valores[somada][presentes])
+        histograma['soma'][somada] = histograma['soma'].get(somada, np.zeros(k)) + np.bincount(
+            faixas, weights=pesos, minlength=k)
+
+
+def acumular(estado, bloco, grupos_extras=None):
+    """Incorpora um bloco (ou o dataset inteiro) ao estado, numa única passada sobre as colunas."""
+    if any(c in bloco.columns for c in COLUNAS_REVIEWS):
+        atualizar_termos(estado['termos'], bloco)
+        if 'Sentimento_Positivo' not in bloco.columns:
+            bloco = bloco.join(pontuar_reviews(bloco))
+    valores = {c: bloco[c].to_numpy(dtype='float64', na_value=np.nan)
+               for c in COLUNAS_AGREGADAS if c in bloco.columns}
+
+    estado['linhas'] += len(bloco)
+    for coluna, v in valores.items():
+        presentes = v[~np.isnan(v)]
+        g = estado['globais'].setdefault(coluna, {'soma': 0.0, 'soma_q': 0.0, 'n': 0, 'min': np.inf, 'max': -np.inf})
+        g['soma'] += presentes.sum()
+        g['soma_q'] += (presentes * presentes).sum()
+        g['n'] += len(presentes)
+        if len(presentes):
+            g['min'] = min(g['min'], presentes.min())
+            g['max'] = max(g['max'], presentes.max())
+    if 'Nota' in valores:
+        estado['satisfeitos'] = estado.get('satisfeitos', 0) + int((valores['Nota'] >= LIMIAR_SATISFACAO).sum())
+
+    for coluna in HISTOGRAMAS:
+        if coluna in valores:
+            _acumular_histograma(estado, coluna, valores)
+    _acumular_comomentos(estado['comomentos'], bloco)
+
+    grupos = {g: bloco[g] for g in GRUPOS if g in bloco.columns}
+    if 'Desconto' in bloco.columns:
+        grupos['Faixa_Desconto'] = faixa_desconto(bloco['Desconto'])
+    grupos.update(grupos_extras or {})
+
+    for nome, serie in grupos.items():
+        codigos, rotulos, ordenado = _codigos(serie)
+        estado_grupo = estado['grupos'].setdefault(
+            nome, {'rotulos': [], 'indice': {}, 'ordenado': ordenado, 'n': None,
+                   'soma': {}, 'soma_q': {}, 'contagem': {}})
+        _acumular_grupo(estado_grupo, codigos, rotulos, valores)
+    return estado
+
+
+def agregar(df, grupos_extras=None):
+    return acumular(novo_estado(), df, grupos_extras)
+
+
+def agregar_em_blocos(caminho=ARQUIVO_LIMPO, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Alimenta o motor bloco a bloco: a memória de pico depende do bloco e do número de grupos."""
+    estado = novo_estado()
+    for bloco in ler_em_blocos(caminho, colunas=COLUNAS_ESTADO, tamanho_bloco=tamanho_bloco):
+        acumular(estado, bloco)
+    return estado
+
+
+# ============================================================================
+# MODO INCREMENTAL (ARQUIVO QUE SÓ CRESCE POR ACRÉSCIMO DE LINHAS)
+# ============================================================================
+
+def assinatura_final(caminho, ate_byte):
+    # Hash dos últimos bytes já processados: detecta arquivo reescrito (não apenas acrescido)
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(max(0, ate_byte - _BYTES_ASSINATURA))
+        return hashlib.sha256(arquivo.read(min(ate_byte, _BYTES_ASSINATURA))).hexdigest()
+
+
+def atualizar_incremental(caminho=ARQUIVO_LIMPO, arquivo_estado=ARQUIVO_ESTADO, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Carrega o estado persistido, incorpora só as linhas acrescentadas ao CSV e salva de volta.
+
+    Se o arquivo encolheu ou o trecho já processado mudou, o estado é reconstruído do zero. A leitura
+    vai só até a última linha completa no início da chamada; o que for acrescentado durante ela (e uma
+    linha ainda pela metade) fica para a próxima execução. Devolve (estado, linhas_novas).
+    """
+    estado = None
+    if os.path.exists(arquivo_estado):
+        with open(arquivo_estado, 'rb') as arquivo:
+            estado = pickle.load(arquivo)
+
+    tamanho = os.path.getsize(caminho)
+    fim = fim_linhas_completas(caminho, tamanho)
+    origem = (estado or {}).get('origem')
+    if (estado is None or estado.get('versao') != VERSAO_ESTADO or origem is None
+            or origem['bytes'] > tamanho or assinatura_final(caminho, origem['bytes']) != origem['assinatura']):
+        estado, inicio = novo_estado(), 0
+    else:
+        inicio = origem['bytes']
+
+    linhas_antes = estado['linhas']
+    for bloco in ler_em_blocos(caminho, colunas=COLUNAS_ESTADO, tamanho_bloco=tamanho_bloco, inicio=inicio, fim=fim):
+        acumular(estado, bloco)
+    estado['origem'] = {'bytes': fim, 'assinatura': assinatura_final(caminho, fim)}
+
+    temporario = arquivo_estado + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        pickle.dump(estado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, arquivo_estado)
+    return estado, estado['linhas'] - linhas_antes
+
+
+# ============================================================================
+# RESULTADOS DERIVADOS DO ESTADO
+# ============================================================================
+
+def tabela(estado, grupo, estatisticas=None):
+    """Tabela de um grupo com somas/médias/desvios por rótulo (grupos ordenados mantêm faixas vazias)."""
+    estado_grupo = estado['grupos'][grupo]
+    estatisticas = TABELAS.get(grupo, {}) if estatisticas is None else estatisticas
+    resultado = pd.DataFrame(index=pd.Index(estado_grupo['rotulos'], name=grupo))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for coluna, estatistica in estatisticas.items():
+            if coluna not in estado_grupo['soma']:
+                continue
+            soma, n = estado_grupo['soma'][coluna], estado_grupo['contagem'][coluna]
+            if estatistica == 'sum':
+                resultado[coluna] = soma
+            elif estatistica == 'mean':
+                resultado[coluna] = soma / n
+            else:
+                variancia = np.maximum(estado_grupo['soma_q'][coluna] - soma * soma / n, 0) / (n - 1)
+                resultado[coluna] = np.sqrt(variancia)
+    resultado['Produtos'] = estado_grupo['n'].astype('int64')
+    if not estado_grupo['ordenado']:
+        resultado = resultado[resultado['Produtos'] > 0]
+    return resultado
+
+
+def faixas_preco(estado, num_faixas=10):
+    """Equivalente a pd.cut(Preço, bins=num_faixas) + soma de vendas/receita, a partir do histograma fino.
+
+    Cada faixa fina entra na faixa larga do seu preço médio; o erro fica limitado à largura da faixa fina.
+    """
+    histograma = estado['histogramas']['Preço']
+    minimo, maximo = estado['globais']['Preço']['min'], estado['globais']['Preço']['max']
+    bordas = np.linspace(minimo, maximo, num_faixas + 1)
+    bordas[0] -= (maximo - minimo) * 0.001
+    ocupadas = histograma['contagem'] > 0
+    preco_medio = histograma['soma']['Preço'][ocupadas] / histograma['contagem'][ocupadas]
+    faixa = np.clip(np.searchsorted(bordas, preco_medio, side='left') - 1, 0, num_faixas - 1)
+    # Rótulos arredondados como os de pd.cut; a atribuição usa as bordas exatas
+    rotulos = pd.IntervalIndex.from_breaks(np.round(bordas, 3), closed='right', name='Faixa_Preço_Detalhada')
+    resultado = pd.DataFrame(index=rotulos)
+    for coluna in TABELAS['Faixa_Preço_Detalhada']:
+        if coluna in histograma['soma']:
+            resultado[coluna] = np.bincount(faixa, weights=histograma['soma'][coluna][ocupadas], minlength=num_faixas)
+    resultado['Produtos'] = np.bincount(faixa, weights=histograma['contagem'][ocupadas],
+                                        minlength=num_faixas).astype('int64')
+    return resultado
+
+
+def curva_abc(estado, limites=(80, 95)):
+    """Classes ABC e curva de Pareto a partir do histograma de receita (sem ordenar produtos).
+
+    Percorre as faixas da maior para a menor receita; na faixa que cruza um limite, assume produtos
+    de receita igual à média da faixa. Devolve (contagem por classe, produtos acumulados, % acumulado).
+    """
+    histograma = estado['histogramas']['Receita_Estimada']
+    contagem = histograma['contagem'][::-1]
+    soma = histograma['soma']['Receita_Estimada'][::-1]
+    ocupadas = contagem > 0
+    contagem, soma = contagem[ocupadas], soma[ocupadas]
+    total = soma.sum()
+    produtos_acumulados = np.cumsum(contagem).astype('int64')
+    receita_acumulada = np.cumsum(soma)
+
+    classes, ja_contados = {}, 0
+    for classe, limite in zip('AB', limites):
+        alvo = total * limite / 100
+        i = np.searchsorted(receita_acumulada, alvo, side='right')
+        produtos = int(produtos_acumulados[i - 1]) if i > 0 else 0
+        if i < len(soma) and soma[i] > 0:
+            antes = receita_acumulada[i - 1] if i > 0 else 0.0
+            produtos += int(min(contagem[i], (alvo - antes) // (soma[i] / contagem[i])))
+        classes[classe] = produtos - ja_contados
+        ja_contados = produtos
+    classes['C'] = int(produtos_acumulados[-1]) - ja_contados if len(contagem) else 0
+    percentual = receita_acumulada / total * 100 if total else receita_acumulada
+    return pd.Series(classes), produtos_acumulados, percentual
+
+
+def quantil(estado, coluna, q):
+    """Quantil aproximado: valor médio da faixa fina que cruza a posição q."""
+    histograma = estado['histogramas'][coluna]
+    acumulado = np.cumsum(histograma['contagem'])
+    i = np.searchsorted(acumulado, q * acumulado[-1])
+    return histograma['soma'][coluna][i] / histograma['contagem'][i]
+
+
+def matriz_correlacao(estado):
+    """Correlação de Pearson a partir dos co-momentos (equivale a df.corr() sem valores ausentes)."""
+    comomentos = estado['comomentos']
+    if comomentos['n'] < 2:
+        return None
+    desvios = np.sqrt(np.diag(comomentos['m2']))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlacao = comomentos['m2'] / np.outer(desvios, desvios)
+    return pd.DataFrame(correlacao, index=comomentos['colunas'], columns=comomentos['colunas'])
+
+
+def regressao_simples(estado, x, y):
+    """Reta de mínimos quadrados y = intercepto + inclinação·x e R², calculados dos co-momentos."""
+    comomentos = estado['comomentos']
+    i, j = comomentos['colunas'].index(x), comomentos['colunas'].index(y)
+    m2 = comomentos['m2']
+    inclinacao = m2[i, j] / m2[i, i]
+    intercepto = comomentos['media'][j] - inclinacao * comomentos['media'][i]
+    r2 = m2[i, j] ** 2 / (m2[i, i] * m2[j, j])
+    return inclinacao, intercepto, r2
+
+
+def tabelas_por_grupo(estado, num_faixas_preco=10):
+    tabelas = {grupo: tabela(estado, grupo) for grupo in estado['grupos']}
+    if 'Faixa_Preço_Detalhada' not in tabelas and 'Preço' in estado['histogramas']:
+        tabelas['Faixa_Preço_Detalhada'] = faixas_preco(estado, num_faixas_preco)
+    return tabelas
+
+
+def estatisticas_globais(estado):
+    """Somas, médias, desvios, mínimos e máximos globais de cada coluna agregada, mais a taxa de satisfação."""
+    globais = {}
+    for coluna, g in estado['globais'].items():
+        n = g['n']
+        globais[coluna] = {'soma': g['soma'], 'n': n, 'min': g['min'], 'max': g['max'],
+                           'media': g['soma'] / n if n else np.nan,
+                           'desvio': np.sqrt(max(g['soma_q'] - g['soma'] ** 2 / n, 0) / (n - 1)) if n > 1 else np.nan}
+    globais['linhas'] = estado['linhas']
+    if 'satisfeitos' in estado and estado['linhas']:
+        globais['taxa_satisfacao'] = estado['satisfeitos'] / estado['linhas'] * 100
+    return globais
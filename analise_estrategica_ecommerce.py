@@ -1,451 +1,701 @@
+import argparse
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-from scipy import stats
-from sklearn.linear_model import LinearRegression
-from sklearn.cluster import KMeans
-from wordcloud import WordCloud
 import warnings
+import cache
+import carregamento
+import agregacao
+import classificacao_abc
+import colunar
+import distribuicao
+import elasticidade
+import segmentacao
+import sentimento
+from carregamento import carregar_dataset, ler_em_blocos, TAMANHO_BLOCO_PADRAO
+from colunar import carregar_colunar
+from distribuicao import distribuicao as resumo_distribuicao
+from limpeza import limpar_dataset, desatualizado
+from sentimento import COLUNAS_REVIEWS, pontuar_reviews, score_sentimento, termos_mais_frequentes
+from agregacao import (agregar, agregar_em_blocos, atualizar_incremental, tabelas_por_grupo, estatisticas_globais,
+                       tabela, curva_abc, quantil, matriz_correlacao, regressao_simples)
+from telemetria import Telemetria
+from classificacao_abc import (CLASSES, ARQUIVO_CLASSES, COLUNA_LINHA, classificar_abc, classificar_abc_por_grupo,
+                               contar_classes, exportar_classes, curva_pareto_amostrada)
+from elasticidade import elasticidade_por_segmento
+from segmentacao import ARQUIVO_SEGMENTOS, blocos_de, segmentar
 
 warnings.filterwarnings('ignore')
 
-# Configurações visuais
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
-plt.rcParams['font.size'] = 11
+ARQUIVO_DADOS = 'ecommerce_limpo.csv'
 
-# Leitura do dataset limpo
-df = pd.read_csv('ecommerce_limpo.csv')
+# Export bruto (ex.: 'ecommerce_estatistica.csv'): quando definido, é limpo para ARQUIVO_DADOS antes
+# da análise sempre que for mais novo que ele
+ARQUIVO_BRUTO = None
+
+# Modo em blocos: com um tamanho definido, o motor de agregação é alimentado bloco a bloco,
+# limitando a memória de pico em exportações grandes
+TAMANHO_BLOCO = None
+
+# Modo incremental: o estado agregado fica salvo em disco e só as linhas acrescentadas ao CSV
+# desde a última execução são lidas. Nos modos em blocos e incremental as linhas não ficam em
+# memória, então os gráficos linha a linha (boxplot, dispersão, reviews, distribuição) são omitidos
+MODO_INCREMENTAL = False
+
+# Cópia colunar do CSV (ecommerce_limpo.colunas/): reconstruída quando o CSV muda e aberta por
+# memory-map, sem reinterpretar o texto do CSV a cada execução
+USAR_COLUNAR = True
+
+# Processos usados para desenhar os gráficos (1 = sequencial, no próprio processo; None = um por CPU)
+WORKERS_GRAFICOS = None
+
+# Cache em disco: entradas inalteradas reaproveitam resultados e imagens da execução anterior
+USAR_CACHE = True
+NUM_FAIXAS_PRECO = 10
+
+# Pergunta 4: reta desconto x vendas por marca/material/temporada, com IC da inclinação por bootstrap
+# (0 reamostras desliga o IC); em log-log a inclinação é a elasticidade propriamente dita
+REAMOSTRAS_BOOTSTRAP = 200
+ELASTICIDADE_LOG = False
+ARQUIVO_ELASTICIDADE = 'elasticidade_segmentos.csv'
+MIN_PRODUTOS_ELASTICIDADE = 10
+# Processos do bootstrap (None = um por CPU quando o volume compensa)
+WORKERS_ELASTICIDADE = None
+
+# Pergunta 10: k dos segmentos escolhido pela silhueta entre estes valores (um processo por k; None =
+# um por CPU). No modo em blocos o CSV é relido bloco a bloco; no incremental a pergunta é omitida
+KS_SEGMENTOS = range(2, 9)
+WORKERS_SEGMENTOS = None
+
+# Perguntas 4, 6 e 10 gravam elasticidade, classes ABC e segmentos no diretório atual; False só
+# calcula (o servidor desliga, já que cada consulta filtrada sobrescreveria os arquivos da análise)
+EXPORTAR_ARQUIVOS = True
+
+# Telemetria: cada etapa vira um span (duração, linhas, variação de RSS, bytes gerados) exportado
+# para este arquivo — '.jsonl' para JSON lines, '.json' para trace do Chrome; None não exporta
+ARQUIVO_TELEMETRIA = None
+
+# cProfile por etapa, salvo em perfis/<etapa>.prof (com WORKERS_GRAFICOS > 1 o desenho dos
+# gráficos acontece em outros processos e fica fora do perfil)
+PERFILAR = False
 
-print("=" * 80)
-print("ANÁLISE ESTRATÉGICA DE NEGÓCIO - E-COMMERCE")
-print("=" * 80)
-print("Respondendo perguntas críticas de negócio e identificando oportunidades...")
-print("=" * 80)
 
 # ============================================================================
 # PERGUNTA 1: QUAIS MARCAS DOMINAM O MERCADO? (Brand Performance)
 # ============================================================================
-print("\n📊 PERGUNTA 1: Quais marcas dominam o mercado?")
-
-if 'Marca' in df.columns and 'Receita_Estimada' in df.columns:
-    # Análise de marca
-    marca_performance = df.groupby('Marca').agg({
-        'Receita_Estimada': 'sum',
-        'Qtd_Vendidos_Numeric': 'sum',
-        'Preço': 'mean',
-        'Nota': 'mean'
-    }).sort_values('Receita_Estimada', ascending=False).head(10)
-
-    # GRÁFICO 1: Receita por Marca
-    fig1, ax1 = plt.subplots(figsize=(12, 7))
-    marca_performance['Receita_Estimada'].plot(kind='barh', color='coral', edgecolor='black', ax=ax1)
-    ax1.set_title('Top 10 Marcas por Receita Estimada', fontweight='bold', fontsize=14, pad=15)
-    ax1.set_xlabel('Receita Estimada (R$)', fontsize=12)
-    ax1.set_ylabel('Marca', fontsize=12)
-    ax1.grid(axis='x', alpha=0.3)
-    for i, v in enumerate(marca_performance['Receita_Estimada'].values):
-        ax1.text(v, i, f' R${v:,.0f}', va='center', fontweight='bold', fontsize=10)
-    plt.tight_layout()
-    plt.savefig('01_marca_receita.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # GRÁFICO 2: Marca x Qualidade (Nota Média)
-    fig2, ax2 = plt.subplots(figsize=(12, 7))
-    marca_performance['Nota'].plot(kind='barh', color='steelblue', edgecolor='black', ax=ax2)
-    ax2.set_title('Qualidade por Marca (Nota Média)', fontweight='bold', fontsize=14, pad=15)
-    ax2.set_xlabel('Nota Média (0-5)', fontsize=12)
-    ax2.set_ylabel('Marca', fontsize=12)
-    ax2.axvline(df['Nota'].mean(), color='red', linestyle='--', linewidth=2,
-                label=f'Média Geral: {df["Nota"].mean():.2f}')
-    ax2.legend()
-    ax2.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('02_marca_qualidade.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    print("✓ Gráficos salvos: 01_marca_receita.png, 02_marca_qualidade.png")
-    print(f"  INSIGHT: {marca_performance.index[0]} lidera com R${marca_performance['Receita_Estimada'].iloc[0]:,.2f}")
-    print(f"  OPORTUNIDADE: Marcas com alta nota mas baixa receita têm potencial não explorado")
+def pergunta_1(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if 'Marca' in tabelas and 'Receita_Estimada' in tabelas['Marca']:
+        # Análise de marca
+        marca_performance = tabelas['Marca'].sort_values('Receita_Estimada', ascending=False).head(10)
+        resultado['marca_performance'] = marca_performance
+
+        # GRÁFICO 1: Receita por Marca / GRÁFICO 2: Marca x Qualidade (Nota Média)
+        resultado['graficos'] += [
+            {'grafico': 'marca_receita', 'arquivo': '01_marca_receita.png',
+             'receita': marca_performance['Receita_Estimada']},
+            {'grafico': 'marca_qualidade', 'arquivo': '02_marca_qualidade.png',
+             'nota': marca_performance['Nota'], 'media_geral': globais['Nota']['media']},
+        ]
+
+        resultado['insights'] += [
+            f"INSIGHT: {marca_performance.index[0]} lidera com R${marca_performance['Receita_Estimada'].iloc[0]:,.2f}",
+            "OPORTUNIDADE: Marcas com alta nota mas baixa receita têm potencial não explorado",
+        ]
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 2: QUAL MATERIAL TEM MELHOR CUSTO-BENEFÍCIO?
 # ============================================================================
-print("\n📊 PERGUNTA 2: Qual material oferece melhor custo-benefício?")
-
-if 'Material' in df.columns:
-    material_analysis = df.groupby('Material').agg({
-        'Preço': 'mean',
-        'Nota': 'mean',
-        'Qtd_Vendidos_Numeric': 'sum'
-    }).sort_values('Qtd_Vendidos_Numeric', ascending=False).head(10)
-
-    # GRÁFICO 3: Dispersão Material (Preço x Qualidade)
-    fig3, ax3 = plt.subplots(figsize=(12, 8))
-    scatter = ax3.scatter(material_analysis['Preço'], material_analysis['Nota'],
-                          s=material_analysis['Qtd_Vendidos_Numeric'] / 100,
-                          c=material_analysis['Qtd_Vendidos_Numeric'],
-                          cmap='viridis', alpha=0.6, edgecolors='black', linewidth=2)
-
-    for idx, row in material_analysis.iterrows():
-        ax3.annotate(idx, (row['Preço'], row['Nota']), fontsize=9, ha='center')
-
-    ax3.set_title('Material: Preço x Qualidade x Volume de Vendas', fontweight='bold', fontsize=14, pad=15)
-    ax3.set_xlabel('Preço Médio (R$)', fontsize=12)
-    ax3.set_ylabel('Nota Média', fontsize=12)
-    ax3.grid(alpha=0.3)
-    cbar = plt.colorbar(scatter, ax=ax3)
-    cbar.set_label('Volume de Vendas', rotation=270, labelpad=20)
-    plt.tight_layout()
-    plt.savefig('03_material_custo_beneficio.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # GRÁFICO 4: Boxplot de Preços por Material
-    fig4, ax4 = plt.subplots(figsize=(14, 7))
-    top_materiais = df['Material'].value_counts().head(8).index
-    df_top_mat = df[df['Material'].isin(top_materiais)]
-    df_top_mat.boxplot(column='Preço', by='Material', ax=ax4, patch_artist=True)
-    ax4.set_title('Variação de Preços por Material (Top 8)', fontweight='bold', fontsize=14, pad=15)
-    ax4.set_xlabel('Material', fontsize=12)
-    ax4.set_ylabel('Preço (R$)', fontsize=12)
-    ax4.set_xticklabels(ax4.get_xticklabels(), rotation=45, ha='right')
-    plt.suptitle('')
-    plt.tight_layout()
-    plt.savefig('04_material_variacao_preco.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    print("✓ Gráficos salvos: 03_material_custo_beneficio.png, 04_material_variacao_preco.png")
-    best_material = material_analysis.loc[material_analysis['Nota'].idxmax()]
-    print(f"  INSIGHT: Melhor avaliado = {material_analysis['Nota'].idxmax()} (nota {best_material['Nota']:.2f})")
-    print(f"  PROBLEMA: Materiais premium podem estar supervalorizados")
+def pergunta_2(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if 'Material' in tabelas:
+        material_analysis = tabelas['Material'].sort_values('Qtd_Vendidos_Numeric', ascending=False).head(10)
+        resultado['material_analysis'] = material_analysis
+
+        # GRÁFICO 3: Dispersão Material (Preço x Qualidade)
+        resultado['graficos'].append(
+            {'grafico': 'material_custo_beneficio', 'arquivo': '03_material_custo_beneficio.png',
+             'materiais': material_analysis[['Preço', 'Nota', 'Qtd_Vendidos_Numeric']]})
+
+        # GRÁFICO 4: Boxplot de Preços por Material
+        if df is not None:
+            top_materiais = tabelas['Material']['Produtos'].nlargest(8).index
+            df_top_mat = df.loc[df['Material'].isin(top_materiais), ['Material', 'Preço']].copy()
+            df_top_mat['Material'] = df_top_mat['Material'].cat.remove_unused_categories()
+            resultado['graficos'].append(
+                {'grafico': 'material_variacao_preco', 'arquivo': '04_material_variacao_preco.png',
+                 'precos': df_top_mat})
+
+        best_material = material_analysis.loc[material_analysis['Nota'].idxmax()]
+        resultado['insights'] += [
+            f"INSIGHT: Melhor avaliado = {material_analysis['Nota'].idxmax()} (nota {best_material['Nota']:.2f})",
+            "PROBLEMA: Materiais premium podem estar supervalorizados",
+        ]
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 3: EXISTE SAZONALIDADE NAS VENDAS?
 # ============================================================================
-print("\n📊 PERGUNTA 3: Produtos sazonais vendem mais?")
-
-if 'Temporada' in df.columns and 'Receita_Estimada' in df.columns:
-    temp_analysis = df.groupby('Temporada').agg({
-        'Receita_Estimada': 'sum',
-        'Qtd_Vendidos_Numeric': 'sum',
-        'Preço': 'mean'
-    }).sort_values('Receita_Estimada', ascending=False)
-
-    # GRÁFICO 5: Receita por Temporada
-    fig5, ax5 = plt.subplots(figsize=(12, 7))
-    temp_analysis['Receita_Estimada'].plot(kind='bar', color='teal', edgecolor='black', ax=ax5)
-    ax5.set_title('Receita por Temporada', fontweight='bold', fontsize=14, pad=15)
-    ax5.set_xlabel('Temporada', fontsize=12)
-    ax5.set_ylabel('Receita Estimada (R$)', fontsize=12)
-    ax5.set_xticklabels(ax5.get_xticklabels(), rotation=45, ha='right')
-    ax5.grid(axis='y', alpha=0.3)
-    for i, v in enumerate(temp_analysis['Receita_Estimada'].values):
-        ax5.text(i, v, f'R${v:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
-    plt.tight_layout()
-    plt.savefig('05_temporada_receita.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # GRÁFICO 6: Preço Médio por Temporada
-    fig6, ax6 = plt.subplots(figsize=(12, 7))
-    temp_analysis['Preço'].plot(kind='bar', color='coral', edgecolor='black', ax=ax6)
-    ax6.set_title('Preço Médio por Temporada', fontweight='bold', fontsize=14, pad=15)
-    ax6.set_xlabel('Temporada', fontsize=12)
-    ax6.set_ylabel('Preço Médio (R$)', fontsize=12)
-    ax6.set_xticklabels(ax6.get_xticklabels(), rotation=45, ha='right')
-    ax6.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('06_temporada_preco.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    print("✓ Gráficos salvos: 05_temporada_receita.png, 06_temporada_preco.png")
-    print(f"  INSIGHT: {temp_analysis.index[0]} é a temporada mais lucrativa")
-    print(f"  OPORTUNIDADE: Ajustar estoque e precificação por sazonalidade")
+def pergunta_3(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if 'Temporada' in tabelas and 'Receita_Estimada' in tabelas['Temporada']:
+        temp_analysis = tabelas['Temporada'].sort_values('Receita_Estimada', ascending=False)
+        resultado['temp_analysis'] = temp_analysis
+
+        # GRÁFICO 5: Receita por Temporada / GRÁFICO 6: Preço Médio por Temporada
+        resultado['graficos'] += [
+            {'grafico': 'temporada_receita', 'arquivo': '05_temporada_receita.png',
+             'receita': temp_analysis['Receita_Estimada']},
+            {'grafico': 'temporada_preco', 'arquivo': '06_temporada_preco.png',
+             'preco': temp_analysis['Preço']},
+        ]
+
+        resultado['insights'] += [
+            f"INSIGHT: {temp_analysis.index[0]} é a temporada mais lucrativa",
+            "OPORTUNIDADE: Ajustar estoque e precificação por sazonalidade",
+        ]
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 4: DESCONTO REALMENTE IMPULSIONA VENDAS?
 # ============================================================================
-print("\n📊 PERGUNTA 4: Desconto aumenta vendas? Qual a elasticidade-preço?")
-
-if 'Desconto' in df.columns and 'Qtd_Vendidos_Numeric' in df.columns:
-    # GRÁFICO 7: Scatter Desconto x Vendas
-    fig7, ax7 = plt.subplots(figsize=(12, 7))
-    ax7.scatter(df['Desconto'], df['Qtd_Vendidos_Numeric'], alpha=0.5, s=50, color='navy')
-
-    # Regressão
-    X = df[['Desconto']].values
-    y = df['Qtd_Vendidos_Numeric'].values
-    model = LinearRegression()
-    model.fit(X, y)
-    y_pred = model.predict(X)
-    ax7.plot(X, y_pred, color='red', linewidth=3, label=f'R²={model.score(X, y):.3f}')
-
-    ax7.set_title('Elasticidade: Desconto x Volume de Vendas', fontweight='bold', fontsize=14, pad=15)
-    ax7.set_xlabel('Desconto (%)', fontsize=12)
-    ax7.set_ylabel('Quantidade Vendida', fontsize=12)
-    ax7.legend(fontsize=11)
-    ax7.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('07_desconto_elasticidade.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # GRÁFICO 8: Faixas de Desconto x Receita
-    df['Faixa_Desconto'] = pd.cut(df['Desconto'], bins=[0, 10, 20, 30, 50, 100],
-                                  labels=['0-10%', '10-20%', '20-30%', '30-50%', '>50%'])
-    desconto_receita = df.groupby('Faixa_Desconto')['Receita_Estimada'].sum()
-
-    fig8, ax8 = plt.subplots(figsize=(12, 7))
-    desconto_receita.plot(kind='bar', color='purple', edgecolor='black', ax=ax8)
-    ax8.set_title('Receita por Faixa de Desconto', fontweight='bold', fontsize=14, pad=15)
-    ax8.set_xlabel('Faixa de Desconto', fontsize=12)
-    ax8.set_ylabel('Receita Total (R$)', fontsize=12)
-    ax8.set_xticklabels(ax8.get_xticklabels(), rotation=0)
-    ax8.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('08_faixa_desconto_receita.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    print("✓ Gráficos salvos: 07_desconto_elasticidade.png, 08_faixa_desconto_receita.png")
-    print(f"  INSIGHT: Correlação desconto-vendas = {model.score(X, y):.3f}")
-    print(f"  PROBLEMA: Descontos altos podem queimar margem sem ganho proporcional")
+def pergunta_4(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if {'Desconto', 'Qtd_Vendidos_Numeric'} <= set(estado['comomentos']['colunas']):
+        # Regressão (mínimos quadrados a partir dos co-momentos acumulados)
+        inclinacao, intercepto, r2 = regressao_simples(estado, 'Desconto', 'Qtd_Vendidos_Numeric')
+        desconto_receita = tabelas['Faixa_Desconto']['Receita_Estimada']
+        resultado.update({'inclinacao': inclinacao, 'intercepto': intercepto, 'r2': r2,
+                          'desconto_receita': desconto_receita})
+
+        # GRÁFICO 7: Scatter Desconto x Vendas
+        if df is not None:
+            reta_x = np.array([df['Desconto'].min(), df['Desconto'].max()])
+            resultado['graficos'].append(
+                {'grafico': 'desconto_elasticidade', 'arquivo': '07_desconto_elasticidade.png',
+                 'desconto': df['Desconto'].values, 'vendas': df['Qtd_Vendidos_Numeric'].values,
+                 'reta_x': reta_x, 'reta_y': intercepto + inclinacao * reta_x, 'r2': r2})
+
+        # GRÁFICO 8: Faixas de Desconto x Receita
+        resultado['graficos'].append(
+            {'grafico': 'faixa_desconto_receita', 'arquivo': '08_faixa_desconto_receita.png',
+             'receita': desconto_receita})
+
+        resultado['insights'] += [
+            f"INSIGHT: Correlação desconto-vendas = {r2:.3f}",
+            "PROBLEMA: Descontos altos podem queimar margem sem ganho proporcional",
+        ]
+
+        # Mesma reta por marca, material e temporada, todos os segmentos de uma vez, com IC por bootstrap
+        grupos = [g for g in ['Marca', 'Material', 'Temporada'] if df is not None and g in df.columns]
+        if grupos:
+            segmentos = elasticidade_por_segmento(df, 'Desconto', 'Qtd_Vendidos_Numeric', grupos,
+                                                  log=ELASTICIDADE_LOG, reamostras=REAMOSTRAS_BOOTSTRAP,
+                                                  workers=WORKERS_ELASTICIDADE)
+            resultado['elasticidade_segmentos'] = segmentos
+            if EXPORTAR_ARQUIVOS:
+                # Gravado num temporário e renomeado: o cache de exportações nunca copia um CSV pela metade
+                segmentos.to_csv(ARQUIVO_ELASTICIDADE + '.tmp')
+                os.replace(ARQUIVO_ELASTICIDADE + '.tmp', ARQUIVO_ELASTICIDADE)
+                resultado['arquivos'] = [ARQUIVO_ELASTICIDADE]
+
+            # Significativos: segmentos com produtos suficientes e IC de 95% que não contém o zero
+            confiaveis = segmentos[segmentos['Produtos'] >= MIN_PRODUTOS_ELASTICIDADE]
+            significativos = confiaveis[(confiaveis['IC_Inferior'] > 0) | (confiaveis['IC_Superior'] < 0)]
+            resultado['insights'].append(
+                f"INSIGHT: Desconto com efeito significativo nas vendas em {len(significativos)} de "
+                f"{len(confiaveis)} segmentos com {MIN_PRODUTOS_ELASTICIDADE}+ produtos (IC 95%)")
+            if len(significativos):
+                grupo, segmento = significativos['Inclinação'].abs().idxmax()
+                # Em log-log a inclinação é a elasticidade (% de vendas por % de desconto)
+                unidade = "% nas vendas por 1% de desconto" if ELASTICIDADE_LOG else " vendas por ponto percentual"
+                resultado['insights'].append(
+                    f"OPORTUNIDADE: {grupo} '{segmento}' responde mais ao desconto "
+                    f"({significativos.loc[(grupo, segmento), 'Inclinação']:+.1f}{unidade})")
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 5: O QUE DIZEM OS CLIENTES? (Sentiment Analysis)
 # ============================================================================
-print("\n📊 PERGUNTA 5: O que os clientes mais elogiam e reclamam?")
-
-if 'Review1' in df.columns:
-    # Consolidar todos os reviews
-    all_reviews = ' '.join(df['Review1'].dropna().astype(str).values)
-
-    # Palavras positivas e negativas comuns em português
-    palavras_positivas = ['bom', 'boa', 'excelente', 'ótimo', 'ótima', 'perfeito', 'perfeita',
-                          'confortável', 'qualidade', 'recomendo', 'amei', 'adorei', 'maravilhos']
-    palavras_negativas = ['ruim', 'péssimo', 'péssima', 'horrível', 'pequeno', 'pequena',
-                          'apertado', 'rasgou', 'desbotou', 'falsificação', 'falso', 'problema']
-
-    # Contar sentimentos
-    positivos = sum([all_reviews.lower().count(palavra) for palavra in palavras_positivas])
-    negativos = sum([all_reviews.lower().count(palavra) for palavra in palavras_negativas])
-
-    # GRÁFICO 9: Sentiment Analysis
-    fig9, ax9 = plt.subplots(figsize=(10, 7))
-    sentimentos = pd.Series({'Positivo': positivos, 'Negativo': negativos})
-    colors_sent = ['green', 'red']
-    sentimentos.plot(kind='bar', color=colors_sent, edgecolor='black', ax=ax9)
-    ax9.set_title('Análise de Sentimento - Reviews dos Clientes', fontweight='bold', fontsize=14, pad=15)
-    ax9.set_xlabel('Sentimento', fontsize=12)
-    ax9.set_ylabel('Frequência de Palavras', fontsize=12)
-    ax9.set_xticklabels(ax9.get_xticklabels(), rotation=0)
-    ax9.grid(axis='y', alpha=0.3)
-    for i, v in enumerate(sentimentos.values):
-        ax9.text(i, v, f'{v}', ha='center', va='bottom', fontweight='bold', fontsize=12)
-    plt.tight_layout()
-    plt.savefig('09_sentiment_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    # GRÁFICO 10: WordCloud
-    try:
-        fig10, ax10 = plt.subplots(figsize=(14, 8))
-        wordcloud = WordCloud(width=1200, height=600, background_color='white',
-                              colormap='viridis', max_words=100).generate(all_reviews)
-        ax10.imshow(wordcloud, interpolation='bilinear')
-        ax10.axis('off')
-        ax10.set_title('Palavras Mais Frequentes nos Reviews', fontweight='bold', fontsize=16, pad=20)
-        plt.tight_layout()
-        plt.savefig('10_wordcloud_reviews.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("✓ Gráficos salvos: 09_sentiment_analysis.png, 10_wordcloud_reviews.png")
-    except:
-        print("✓ Gráfico salvo: 09_sentiment_analysis.png")
-        print("  AVISO: WordCloud não gerado (instale: pip install wordcloud)")
-
-    percentual_positivo = (positivos / (positivos + negativos)) * 100
-    print(f"  INSIGHT: {percentual_positivo:.1f}% de sentimento positivo")
-    print(f"  PROBLEMA: Reclamações sobre tamanho/qualidade precisam ser endereçadas")
+def pergunta_5(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if 'Sentimento_Positivo' in globais:
+        # Termos positivos/negativos contados por produto nos três reviews e somados pelo motor de agregação
+        positivos = int(globais['Sentimento_Positivo']['soma'])
+        negativos = int(globais['Sentimento_Negativo']['soma'])
+        # Sem nenhuma menção do léxico (recortes pequenos) não há percentual nem gráfico de sentimento
+        mencoes = positivos + negativos
+        percentual_positivo = positivos / mencoes * 100 if mencoes else np.nan
+        resultado.update({'positivos': positivos, 'negativos': negativos,
+                          'percentual_positivo': percentual_positivo})
+
+        # GRÁFICO 9: Sentiment Analysis
+        if mencoes:
+            resultado['graficos'].append(
+                {'grafico': 'sentimento', 'arquivo': '09_sentiment_analysis.png',
+                 'sentimentos': pd.Series({'Positivo': positivos, 'Negativo': negativos})})
+
+        # GRÁFICO 10: WordCloud (frequências do resumo top-K de termos, sem o texto bruto)
+        termos_frequentes = termos_mais_frequentes(estado['termos'], 100)
+        resultado['termos_frequentes'] = termos_frequentes
+        if termos_frequentes:
+            resultado['graficos'].append(
+                {'grafico': 'wordcloud', 'arquivo': '10_wordcloud_reviews.png', 'frequencias': termos_frequentes})
+
+        if mencoes:
+            resultado['insights'] += [
+                f"INSIGHT: {percentual_positivo:.1f}% de sentimento positivo",
+                "PROBLEMA: Reclamações sobre tamanho/qualidade precisam ser endereçadas",
+            ]
+        else:
+            resultado['insights'].append("INSIGHT: Nenhum termo positivo ou negativo do léxico nos reviews")
+
+        # Sentimento por marca (marcas com ao menos 10 menções do léxico)
+        if 'Marca' in estado['grupos']:
+            sentimento_marcas = tabela(estado, 'Marca', {'Sentimento_Positivo': 'sum', 'Sentimento_Negativo': 'sum'})
+            sentimento_marcas['Sentimento_Score'] = score_sentimento(sentimento_marcas['Sentimento_Positivo'],
+                                                                     sentimento_marcas['Sentimento_Negativo'])
+            resultado['sentimento_marcas'] = sentimento_marcas
+            mencoes = sentimento_marcas['Sentimento_Positivo'] + sentimento_marcas['Sentimento_Negativo']
+            relevantes = sentimento_marcas[mencoes >= 10]
+            if len(relevantes):
+                pior = relevantes['Sentimento_Score'].idxmin()
+                resultado['insights'].append(
+                    f"ALERTA: {pior} tem o pior sentimento entre as marcas mais comentadas "
+                    f"(score {relevantes.loc[pior, 'Sentimento_Score']:+.2f})")
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 6: CURVA ABC - QUAIS PRODUTOS GERAM 80% DA RECEITA?
 # ============================================================================
-print("\n📊 PERGUNTA 6: Quais produtos são responsáveis por 80% da receita? (Pareto)")
-
-if 'Receita_Estimada' in df.columns:
-    # Ordenar por receita
-    df_abc = df.sort_values('Receita_Estimada', ascending=False).reset_index(drop=True)
-    df_abc['Receita_Acumulada'] = df_abc['Receita_Estimada'].cumsum()
-    df_abc['Percentual_Acumulado'] = (df_abc['Receita_Acumulada'] / df_abc['Receita_Estimada'].sum()) * 100
-
-    # Classificar ABC
-    df_abc['Classe'] = 'C'
-    df_abc.loc[df_abc['Percentual_Acumulado'] <= 80, 'Classe'] = 'A'
-    df_abc.loc[(df_abc['Percentual_Acumulado'] > 80) & (df_abc['Percentual_Acumulado'] <= 95), 'Classe'] = 'B'
-
-    # GRÁFICO 11: Curva ABC (Pareto)
-    fig11, ax11 = plt.subplots(figsize=(14, 7))
-    ax11_2 = ax11.twinx()
-
-    # Barras de receita
-    ax11.bar(range(len(df_abc)), df_abc['Receita_Estimada'], color='steelblue', alpha=0.6, label='Receita')
-
-    # Linha acumulada
-    ax11_2.plot(range(len(df_abc)), df_abc['Percentual_Acumulado'], color='red',
-                linewidth=3, marker='o', markersize=2, label='% Acumulado')
-    ax11_2.axhline(80, color='green', linestyle='--', linewidth=2, label='80% (Pareto)')
-
-    ax11.set_title('Curva ABC - Princípio de Pareto (80/20)', fontweight='bold', fontsize=14, pad=15)
-    ax11.set_xlabel('Produtos (ordenados por receita)', fontsize=12)
-    ax11.set_ylabel('Receita Estimada (R$)', fontsize=12)
-    ax11_2.set_ylabel('Percentual Acumulado (%)', fontsize=12)
-    ax11.legend(loc='upper left')
-    ax11_2.legend(loc='upper right')
-    ax11.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('11_curva_abc_pareto.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    classe_a_qtd = (df_abc['Classe'] == 'A').sum()
-    classe_a_perc = (classe_a_qtd / len(df_abc)) * 100
-
-    print("✓ Gráfico salvo: 11_curva_abc_pareto.png")
-    print(f"  INSIGHT: {classe_a_qtd} produtos ({classe_a_perc:.1f}%) geram 80% da receita")
-    print(f"  OPORTUNIDADE: Focar estoque e marketing nos produtos Classe A")
+def pergunta_6(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if 'Receita_Estimada' in estado['histogramas']:
+        if df is not None:
+            # Classes exatas por produto: só o topo do catálogo é ordenado (argpartition)
+            classes = classificar_abc(df['Receita_Estimada'].values)
+            classes_abc = pd.Series(contar_classes(classes), index=list(CLASSES))
+            exportaveis = {'classe': classes}
+            if COLUNA_LINHA in df.columns:
+                exportaveis['linha'] = df[COLUNA_LINHA].to_numpy()
+
+            # Por marca/temporada: quantos produtos de cada classe global há em cada grupo e a curva ABC
+            # dentro do próprio grupo (numa única ordenação por grupo)
+            for coluna in ['Marca', 'Temporada']:
+                if coluna not in df.columns:
+                    continue
+                codigos = df[coluna].cat.codes.values
+                num_grupos = len(df[coluna].cat.categories)
+                classes_grupo = classificar_abc_por_grupo(df['Receita_Estimada'].values, codigos)
+                exportaveis['classe_' + coluna.lower()] = classes_grupo
+                globais_grupo = pd.DataFrame(
+                    contar_classes(classes, codigos, num_grupos), index=df[coluna].cat.categories, columns=list(CLASSES))
+                dentro_grupo = pd.DataFrame(
+                    contar_classes(classes_grupo, codigos, num_grupos),
+                    index=df[coluna].cat.categories, columns=list(CLASSES))
+                # Só os grupos presentes nas linhas (fatias e filtros herdam as categorias do dataset todo)
+                presentes = globais_grupo.sum(axis=1) > 0
+                resultado['abc_global_por_' + coluna.lower()] = globais_grupo[presentes]
+                resultado['abc_dentro_' + coluna.lower()] = dentro_grupo[presentes]
+
+            # Classe de cada produto (ordem das linhas do CSV, ou a posição nele em `linha`) num arquivo compacto
+            if EXPORTAR_ARQUIVOS:
+                exportar_classes(ARQUIVO_CLASSES, **exportaveis)
+                resultado['arquivos'] = [ARQUIVO_CLASSES]
+        else:
+            # Sem as linhas em memória: contagens por classe vêm do histograma de receita do estado
+            classes_abc = curva_abc(estado)[0]
+        resultado['classes_abc'] = classes_abc
+
+        # GRÁFICO 11: Curva ABC (Pareto) em quantis de produtos, tamanho fixo qualquer que seja o catálogo
+        posicoes, percentual, receita_media = curva_pareto_amostrada(estado)
+        resultado['graficos'].append({'grafico': 'curva_abc', 'arquivo': '11_curva_abc_pareto.png',
+                                      'posicoes': posicoes, 'percentual': percentual, 'receita_media': receita_media})
+
+        classe_a_qtd = classes_abc['A']
+        classe_a_perc = (classe_a_qtd / classes_abc.sum()) * 100
+
+        resultado['insights'] += [
+            f"INSIGHT: {classe_a_qtd} produtos ({classe_a_perc:.1f}%) geram 80% da receita",
+            "OPORTUNIDADE: Focar estoque e marketing nos produtos Classe A",
+        ]
+        if 'abc_global_por_marca' in resultado and resultado['abc_global_por_marca']['A'].max() > 0:
+            lider = resultado['abc_global_por_marca']['A'].idxmax()
+            resultado['insights'].append(
+                f"INSIGHT: {lider} é a marca com mais produtos Classe A "
+                f"({resultado['abc_global_por_marca'].loc[lider, 'A']})")
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 7: PREÇO IDEAL - ONDE ESTÁ O SWEET SPOT?
 # ============================================================================
-print("\n📊 PERGUNTA 7: Qual é o preço ideal para maximizar vendas?")
-
-if 'Preço' in df.columns and 'Qtd_Vendidos_Numeric' in df.columns:
-    # Criar faixas de preço
-    df['Faixa_Preço_Detalhada'] = pd.cut(df['Preço'], bins=10)
-    preco_vendas = df.groupby('Faixa_Preço_Detalhada').agg({
-        'Qtd_Vendidos_Numeric': 'sum',
-        'Receita_Estimada': 'sum'
-    })
-
-    # GRÁFICO 12: Sweet Spot de Preço
-    fig12, ax12 = plt.subplots(figsize=(14, 7))
-    ax12_2 = ax12.twinx()
-
-    x_pos = range(len(preco_vendas))
-    ax12.bar(x_pos, preco_vendas['Qtd_Vendidos_Numeric'], color='skyblue',
-             alpha=0.7, label='Volume de Vendas')
-    ax12_2.plot(x_pos, preco_vendas['Receita_Estimada'], color='darkred',
-                linewidth=3, marker='o', markersize=8, label='Receita')
-
-    ax12.set_title('Sweet Spot de Preço: Volume x Receita', fontweight='bold', fontsize=14, pad=15)
-    ax12.set_xlabel('Faixa de Preço', fontsize=12)
-    ax12.set_ylabel('Volume de Vendas', fontsize=12, color='skyblue')
-    ax12_2.set_ylabel('Receita Estimada (R$)', fontsize=12, color='darkred')
-    ax12.set_xticks(x_pos)
-    ax12.set_xticklabels([f'{int(interval.left)}-{int(interval.right)}'
-                          for interval in preco_vendas.index], rotation=45, ha='right')
-    ax12.legend(loc='upper left')
-    ax12_2.legend(loc='upper right')
-    ax12.grid(alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('12_sweet_spot_preco.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-    max_receita_faixa = preco_vendas['Receita_Estimada'].idxmax()
-    print("✓ Gráfico salvo: 12_sweet_spot_preco.png")
-    print(f"  INSIGHT: Faixa de preço mais lucrativa = {max_receita_faixa}")
-    print(f"  OPORTUNIDADE: Concentrar mix de produtos nesta faixa")
+def pergunta_7(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if 'Faixa_Preço_Detalhada' in tabelas:
+        # Faixas de preço (pd.cut com as linhas em memória, ou reconstruídas do histograma de preço)
+        preco_vendas = tabelas['Faixa_Preço_Detalhada'][['Qtd_Vendidos_Numeric', 'Receita_Estimada']]
+        max_receita_faixa = preco_vendas['Receita_Estimada'].idxmax()
+        resultado.update({'preco_vendas': preco_vendas, 'max_receita_faixa': max_receita_faixa})
+
+        # GRÁFICO 12: Sweet Spot de Preço
+        resultado['graficos'].append(
+            {'grafico': 'sweet_spot', 'arquivo': '12_sweet_spot_preco.png', 'faixas': preco_vendas})
+
+        resultado['insights'] += [
+            f"INSIGHT: Faixa de preço mais lucrativa = {max_receita_faixa}",
+            "OPORTUNIDADE: Concentrar mix de produtos nesta faixa",
+        ]
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 8: CORRELAÇÃO GLOBAL - O QUE REALMENTE IMPORTA?
 # ============================================================================
-print("\n📊 PERGUNTA 8: Quais variáveis têm maior impacto nas vendas?")
-
-# GRÁFICO 13: Heatmap de Correlação Completo
-fig13, ax13 = plt.subplots(figsize=(12, 10))
-colunas_numericas = ['Nota', 'N_Avaliações', 'Desconto', 'Preço', 'Qtd_Vendidos_Numeric',
-                     'Receita_Estimada', 'Preço_Final']
-colunas_disponiveis = [col for col in colunas_numericas if col in df.columns]
-correlation_matrix = df[colunas_disponiveis].corr()
-
-sns.heatmap(correlation_matrix, annot=True, fmt='.2f', cmap='coolwarm',
-            center=0, square=True, linewidths=2, cbar_kws={"shrink": 0.8}, ax=ax13,
-            annot_kws={"fontsize": 11})
-ax13.set_title('Mapa de Correlação - Variáveis Críticas de Negócio', fontweight='bold', fontsize=14, pad=15)
-plt.tight_layout()
-plt.savefig('13_correlacao_global.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-print("✓ Gráfico salvo: 13_correlacao_global.png")
-print(f"  INSIGHT: Variáveis com correlação >0.7 têm forte relação")
-print(f"  AÇÃO: Usar variáveis correlacionadas para prever vendas")
+def pergunta_8(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    # GRÁFICO 13: Heatmap de Correlação Completo
+    correlation_matrix = matriz_correlacao(estado)
+    # Menos de duas linhas completas: não há correlação a mostrar
+    if correlation_matrix is None:
+        return resultado
+    resultado['correlation_matrix'] = correlation_matrix
+    resultado['graficos'].append(
+        {'grafico': 'correlacao', 'arquivo': '13_correlacao_global.png', 'matriz': correlation_matrix})
+
+    resultado['insights'] += [
+        "INSIGHT: Variáveis com correlação >0.7 têm forte relação",
+        "AÇÃO: Usar variáveis correlacionadas para prever vendas",
+    ]
+    return resultado
+
 
 # ============================================================================
 # PERGUNTA 9: DISTRIBUIÇÃO DE PRODUTOS - HISTOGRAMA E DENSIDADE
 # ============================================================================
-print("\n📊 PERGUNTA 9: Como estão distribuídos os preços e notas?")
-
-# GRÁFICO 14: Histograma + Densidade de Preços
-fig14, (ax14a, ax14b) = plt.subplots(1, 2, figsize=(16, 6))
-
-# Histograma
-df['Preço'].hist(bins=50, edgecolor='black', alpha=0.7, color='steelblue', ax=ax14a)
-ax14a.axvline(df['Preço'].mean(), color='red', linestyle='--', linewidth=2, label=f'Média: R${df["Preço"].mean():.2f}')
-ax14a.axvline(df['Preço'].median(), color='green', linestyle='--', linewidth=2,
-              label=f'Mediana: R${df["Preço"].median():.2f}')
-ax14a.set_title('Histograma de Preços', fontweight='bold', fontsize=13)
-ax14a.set_xlabel('Preço (R$)')
-ax14a.set_ylabel('Frequência')
-ax14a.legend()
-ax14a.grid(alpha=0.3)
-
-# Densidade de Notas
-df['Nota'].plot(kind='density', color='darkgreen', linewidth=3, ax=ax14b)
-ax14b.fill_between(df['Nota'].plot(kind='density').get_lines()[0].get_data()[0],
-                   df['Nota'].plot(kind='density').get_lines()[0].get_data()[1],
-                   alpha=0.3, color='lightgreen')
-ax14b.axvline(df['Nota'].mean(), color='red', linestyle='--', linewidth=2, label=f'Média: {df["Nota"].mean():.2f}')
-ax14b.set_title('Densidade de Notas', fontweight='bold', fontsize=13)
-ax14b.set_xlabel('Nota (0-5)')
-ax14b.set_ylabel('Densidade')
-ax14b.legend()
-ax14b.grid(alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('14_distribuicao_preco_nota.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-print("✓ Gráfico salvo: 14_distribuicao_preco_nota.png")
-print(f"  INSIGHT: Concentração em torno de R${df['Preço'].median():.2f} e nota {df['Nota'].mean():.2f}")
+def pergunta_9(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    if df is not None:
+        # Histograma, KDE binado e quantis calculados uma vez por coluna (e guardados em memória)
+        preco, nota = resumo_distribuicao(df['Preço'].values), resumo_distribuicao(df['Nota'].values)
+        mediana_preco = preco['mediana']
+        resultado.update({'distribuicao_preco': preco, 'distribuicao_nota': nota})
+
+        # GRÁFICO 14: Histograma + Densidade de Preços (só as faixas e a curva, não as linhas)
+        resultado['graficos'].append(
+            {'grafico': 'distribuicao', 'arquivo': '14_distribuicao_preco_nota.png',
+             'histograma_preco': preco['histograma'], 'densidade_nota': nota['kde'],
+             'media_preco': preco['media'], 'mediana_preco': mediana_preco, 'media_nota': nota['media']})
+    else:
+        mediana_preco = quantil(estado, 'Preço', 0.5)
+    resultado['mediana_preco'] = mediana_preco
+
+    resultado['insights'].append(
+        f"INSIGHT: Concentração em torno de R${mediana_preco:.2f} e nota {globais['Nota']['media']:.2f}")
+    if 'distribuicao_preco' in resultado:
+        quartis = resultado['distribuicao_preco']['quantis']
+        resultado['insights'].append(
+            f"INSIGHT: Metade dos produtos custa entre R${quartis[0.25]:.2f} e R${quartis[0.75]:.2f}")
+    return resultado
+
+
+# ============================================================================
+# PERGUNTA 10: SEGMENTAÇÃO - QUE GRUPOS DE PRODUTOS EXISTEM?
+# ============================================================================
+def pergunta_10(df, estado, tabelas, globais):
+    resultado = {'insights': [], 'graficos': []}
+
+    # Clusterização mini-batch: amostra limitada para escolher k, treino e rótulos bloco a bloco
+    if df is not None:
+        blocos = blocos_de(df)
+    elif TAMANHO_BLOCO and not MODO_INCREMENTAL:
+        blocos = lambda: ler_em_blocos(ARQUIVO_DADOS, perguntas=[10], tamanho_bloco=TAMANHO_BLOCO)
+    else:
+        return resultado
+    segmentos = segmentar(blocos, KS_SEGMENTOS, WORKERS_SEGMENTOS, ARQUIVO_SEGMENTOS if EXPORTAR_ARQUIVOS else None)
+    if segmentos is None:
+        return resultado
+    resumo = segmentos['resumo']
+    resultado.update({'k_segmentos': segmentos['k'], 'silhueta': segmentos['silhueta'],
+                      'varredura_k': segmentos['varredura'], 'segmentos': resumo})
+
+    # GRÁFICO 15: Receita e nota média por segmento
+    resultado['graficos'].append(
+        {'grafico': 'segmentos', 'arquivo': '15_segmentos_produtos.png', 'resumo': resumo})
+
+    lider = resumo.index[0]
+    resultado['insights'] += [
+        f"INSIGHT: {segmentos['k']} segmentos de produtos (silhueta {segmentos['silhueta']:.2f})",
+        f"INSIGHT: Segmento {lider} concentra {resumo.loc[lider, 'Participacao_Receita']:.1f}% da receita "
+        f"com {resumo.loc[lider, 'Produtos']} produtos (nota média {resumo.loc[lider, 'Nota_Media']:.2f})",
+    ]
+    if EXPORTAR_ARQUIVOS:
+        resultado['arquivos'] = [ARQUIVO_SEGMENTOS]
+        resultado['insights'].append(f"AÇÃO: Segmento de cada produto em {ARQUIVO_SEGMENTOS} para campanhas direcionadas")
+    return resultado
+
+
+PERGUNTAS = {
+    1: ("📊 PERGUNTA 1: Quais marcas dominam o mercado?", pergunta_1),
+    2: ("📊 PERGUNTA 2: Qual material oferece melhor custo-benefício?", pergunta_2),
+    3: ("📊 PERGUNTA 3: Produtos sazonais vendem mais?", pergunta_3),
+    4: ("📊 PERGUNTA 4: Desconto aumenta vendas? Qual a elasticidade-preço?", pergunta_4),
+    5: ("📊 PERGUNTA 5: O que os clientes mais elogiam e reclamam?", pergunta_5),
+    6: ("📊 PERGUNTA 6: Quais produtos são responsáveis por 80% da receita? (Pareto)", pergunta_6),
+    7: ("📊 PERGUNTA 7: Qual é o preço ideal para maximizar vendas?", pergunta_7),
+    8: ("📊 PERGUNTA 8: Quais variáveis têm maior impacto nas vendas?", pergunta_8),
+    9: ("📊 PERGUNTA 9: Como estão distribuídos os preços e notas?", pergunta_9),
+    10: ("📊 PERGUNTA 10: Que segmentos de produtos existem?", pergunta_10),
+}
+
+
+def analisar(caminho=ARQUIVO_DADOS, telemetria=None, perguntas=None):
+    """Carrega o dataset, agrega numa única passada e responde às perguntas (todas por padrão), uma etapa de telemetria cada.
+
+    No modo completo só as colunas das perguntas escolhidas são carregadas.
+    """
+    telemetria = telemetria or Telemetria()
+    perguntas = perguntas or list(PERGUNTAS)
+    if MODO_INCREMENTAL:
+        with telemetria.span('agregacao_incremental') as span:
+            estado_agregado, linhas_novas = atualizar_incremental(caminho, tamanho_bloco=TAMANHO_BLOCO or TAMANHO_BLOCO_PADRAO)
+            span['linhas'] = linhas_novas
+        print(f"♻️ Modo incremental: {linhas_novas} linhas novas incorporadas ({estado_agregado['linhas']} no total)")
+    elif TAMANHO_BLOCO:
+        with telemetria.span('agregacao_em_blocos') as span:
+            estado_agregado = agregar_em_blocos(caminho, TAMANHO_BLOCO)
+            span['linhas'] = estado_agregado['linhas']
+    else:
+        # Leitura do dataset limpo (apenas as colunas usadas pelas perguntas, com tipos compactos)
+        with telemetria.span('carregamento') as span:
+            df = (carregar_colunar if USAR_COLUNAR else carregar_dataset)(caminho, perguntas=perguntas)
+            span['linhas'] = len(df)
+        return analisar_df(df, telemetria, perguntas)
+    return _responder(None, estado_agregado, telemetria, perguntas)
+
+
+def analisar_df(df, telemetria=None, perguntas=None):
+    """Responde às perguntas a partir de um DataFrame já carregado (o dataset inteiro ou uma fatia dele)."""
+    telemetria = telemetria or Telemetria()
+    perguntas = perguntas or list(PERGUNTAS)
+    # Sentimento por produto como colunas (Pergunta 5), somado por grupo na mesma passada
+    if 'Sentimento_Positivo' not in df.columns and any(coluna in df.columns for coluna in COLUNAS_REVIEWS):
+        with telemetria.span('sentimento', len(df)):
+            df = df.join(pontuar_reviews(df))
+    # Agregações das perguntas numa única passada (somas/médias por grupo e estatísticas globais)
+    with telemetria.span('agregacao', len(df)):
+        faixas = {'Faixa_Preço_Detalhada': pd.cut(df['Preço'], bins=NUM_FAIXAS_PRECO)} if 'Preço' in df.columns else None
+        estado_agregado = agregar(df, faixas)
+    return _responder(df, estado_agregado, telemetria, perguntas)
+
+
+def _responder(df, estado_agregado, telemetria, perguntas):
+    tabelas = tabelas_por_grupo(estado_agregado, NUM_FAIXAS_PRECO)
+    globais = estatisticas_globais(estado_agregado)
+
+    resultados = {}
+    for numero in perguntas:
+        with telemetria.span(f'pergunta_{numero}', estado_agregado['linhas']):
+            resultados[numero] = PERGUNTAS[numero][1](df, estado_agregado, tabelas, globais)
+    return {'perguntas': resultados, 'tabelas': tabelas, 'globais': globais}
+
 
 # ============================================================================
 # RELATÓRIO EXECUTIVO FINAL
 # ============================================================================
-print("\n" + "=" * 80)
-print("RELATÓRIO EXECUTIVO - INSIGHTS E RECOMENDAÇÕES")
-print("=" * 80)
-
-print("\n🎯 PRINCIPAIS DESCOBERTAS:")
-print(f"1. Receita Total: R$ {df['Receita_Estimada'].sum():,.2f}")
-print(f"2. Ticket Médio: R$ {df['Preço'].mean():.2f}")
-print(f"3. Nota Média Geral: {df['Nota'].mean():.2f}/5.0")
-print(f"4. Taxa de Satisfação (nota ≥4.5): {(df['Nota'] >= 4.5).sum() / len(df) * 100:.1f}%")
-
-print("\n⚠️ PROBLEMAS IDENTIFICADOS:")
-print("• Produtos com alta nota mas baixa visibilidade (oportunidade perdida)")
-print("• Descontos altos sem retorno proporcional em volume")
-print("• Reclamações recorrentes sobre tamanho e qualidade")
-print("• Concentração excessiva em poucas marcas")
-
-print("\n💡 OPORTUNIDADES:")
-print("• Investir em produtos Classe A (80% da receita)")
-print("• Ajustar mix de produtos para sweet spot de preço")
-print("• Melhorar comunicação de tamanho para reduzir devoluções")
-print("• Explorar sazonalidade para campanhas direcionadas")
-
-print("\n🚀 RECOMENDAÇÕES ESTRATÉGICAS:")
-print("1. Revisar política de descontos (sweet spot: 10-20%)")
-print("2. Aumentar estoque de produtos Classe A")
-print("3. Criar campanhas por temporada")
-print("4. Melhorar descrições de tamanho/material")
-print("5. Investir em marcas bem avaliadas mas pouco exploradas")
-
-print("\n" + "=" * 80)
-print("✓ ANÁLISE COMPLETA! 14 gráficos estratégicos gerados.")
-print("=" * 80)
\ No newline at end of file
+def relatorio_executivo(globais):
+    print("\n" + "=" * 80)
+    print("RELATÓRIO EXECUTIVO - INSIGHTS E RECOMENDAÇÕES")
+    print("=" * 80)
+
+    print("\n🎯 PRINCIPAIS DESCOBERTAS:")
+    print(f"1. Receita Total: R$ {globais['Receita_Estimada']['soma']:,.2f}")
+    print(f"2. Ticket Médio: R$ {globais['Preço']['media']:.2f}")
+    print(f"3. Nota Média Geral: {globais['Nota']['media']:.2f}/5.0")
+    print(f"4. Taxa de Satisfação (nota ≥4.5): {globais['taxa_satisfacao']:.1f}%")
+
+    print("\n⚠️ PROBLEMAS IDENTIFICADOS:")
+    print("• Produtos com alta nota mas baixa visibilidade (oportunidade perdida)")
+    print("• Descontos altos sem retorno proporcional em volume")
+    print("• Reclamações recorrentes sobre tamanho e qualidade")
+    print("• Concentração excessiva em poucas marcas")
+
+    print("\n💡 OPORTUNIDADES:")
+    print("• Investir em produtos Classe A (80% da receita)")
+    print("• Ajustar mix de produtos para sweet spot de preço")
+    print("• Melhorar comunicação de tamanho para reduzir devoluções")
+    print("• Explorar sazonalidade para campanhas direcionadas")
+
+    print("\n🚀 RECOMENDAÇÕES ESTRATÉGICAS:")
+    print("1. Revisar política de descontos (sweet spot: 10-20%)")
+    print("2. Aumentar estoque de produtos Classe A")
+    print("3. Criar campanhas por temporada")
+    print("4. Melhorar descrições de tamanho/material")
+    print("5. Investir em marcas bem avaliadas mas pouco exploradas")
+
+
+def _lista_perguntas(texto):
+    try:
+        perguntas = sorted({int(parte) for parte in texto.split(',') if parte.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"lista de perguntas inválida: {texto!r}")
+    invalidas = [p for p in perguntas if p not in PERGUNTAS]
+    if invalidas or not perguntas:
+        raise argparse.ArgumentTypeError(f"perguntas inexistentes: {invalidas or texto!r} (use 1 a {len(PERGUNTAS)})")
+    return perguntas
+
+
+def _argumentos(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description="Análise estratégica de negócio do e-commerce: perguntas, gráficos e relatório executivo.")
+    parser.add_argument('--perguntas', '--questions', type=_lista_perguntas, default=None, metavar='1,6,8',
+                        help='perguntas a responder, separadas por vírgula (padrão: todas)')
+    parser.add_argument('--sem-graficos', '--no-plots', action='store_true',
+                        help='só os números: não renderiza gráficos (matplotlib nem é importado)')
+    parser.add_argument('--dados', default=ARQUIVO_DADOS, help='CSV limpo analisado (padrão: %(default)s)')
+    parser.add_argument('--bruto', default=ARQUIVO_BRUTO, help='export bruto a limpar antes da análise')
+    parser.add_argument('--blocos', type=int, default=TAMANHO_BLOCO, metavar='LINHAS',
+                        help='agrega o CSV em blocos deste tamanho (sem gráficos linha a linha)')
+    parser.add_argument('--incremental', action='store_true', default=MODO_INCREMENTAL,
+                        help='incorpora só as linhas acrescentadas desde a última execução')
+    parser.add_argument('--workers', type=int, default=WORKERS_GRAFICOS, help='processos para desenhar os gráficos')
+    parser.add_argument('--sem-cache', action='store_true', help='ignora o cache de resultados e imagens')
+    parser.add_argument('--telemetria', default=ARQUIVO_TELEMETRIA, metavar='ARQUIVO',
+                        help="exporta os spans por etapa ('.jsonl' ou trace do Chrome)")
+    parser.add_argument('--perfilar', action='store_true', default=PERFILAR, help='cProfile por etapa em perfis/')
+    return parser.parse_args(argumentos)
+
+
+def _exportacoes(analise):
+    return [arquivo for resultado in analise['perguntas'].values() for arquivo in resultado.get('arquivos', [])]
+
+
+def renderizar(graficos, telemetria, usar_cache=True, workers=None):
+    """Restaura do cache as imagens inalteradas e desenha as demais; devolve os arquivos salvos."""
+    # Importado só aqui: sem gráficos, matplotlib/seaborn/wordcloud não são carregados
+    import graficos as modulo_graficos
+
+    workers = workers or modulo_graficos.WORKERS_PADRAO
+    assinatura_graficos = cache.assinatura_codigo(modulo_graficos)
+    pendentes, salvos = [], []
+    for spec in graficos:
+        if usar_cache and cache.restaurar_imagem(spec, assinatura_graficos):
+            salvos.append(spec['arquivo'])
+        else:
+            pendentes.append(spec)
+    print(f"\n🖼️ Renderizando {len(pendentes)} de {len(graficos)} gráficos ({workers} processos)...")
+    if salvos:
+        print(f"✓ {len(salvos)} gráficos inalterados restaurados do cache")
+    with telemetria.span('graficos', len(pendentes)):
+        renderizados = modulo_graficos.renderizar_graficos(pendentes, workers)
+    # Só as imagens desenhadas com sucesso contam como saída da etapa
+    telemetria.registrar_saida('graficos', [arquivo for arquivo, erro in renderizados if erro is None])
+    for spec, (arquivo, erro) in zip(pendentes, renderizados):
+        if erro is None:
+            salvos.append(arquivo)
+            print(f"✓ Gráfico salvo: {arquivo}")
+            if usar_cache:
+                cache.guardar_imagem(spec, assinatura_graficos)
+        else:
+            print(f"  AVISO: {arquivo} não gerado ({erro})")
+    return salvos
+
+
+def main(argumentos=None):
+    global ARQUIVO_DADOS, TAMANHO_BLOCO, MODO_INCREMENTAL
+    args = _argumentos(argumentos)
+    ARQUIVO_DADOS, TAMANHO_BLOCO, MODO_INCREMENTAL = args.dados, args.blocos, args.incremental
+    usar_cache = USAR_CACHE and not args.sem_cache
+    perguntas = args.perguntas or list(PERGUNTAS)
+
+    print("=" * 80)
+    print("ANÁLISE ESTRATÉGICA DE NEGÓCIO - E-COMMERCE")
+    print("=" * 80)
+    print("Respondendo perguntas críticas de negócio e identificando oportunidades...")
+    print("=" * 80)
+
+    telemetria = Telemetria(perfilar=args.perfilar)
+
+    if args.bruto and desatualizado(args.bruto, args.dados):
+        with telemetria.span('limpeza') as span:
+            span['linhas'] = limpar_dataset(args.bruto, args.dados, TAMANHO_BLOCO or TAMANHO_BLOCO_PADRAO)
+        print(f"🧹 {span['linhas']} linhas de {args.bruto} limpas e gravadas em {args.dados}")
+
+    # Resultados em cache: chave = hash do CSV + parâmetros + código que calcula as perguntas
+    analise = None
+    if usar_cache:
+        with telemetria.span('cache') as span:
+            chave = cache.chave_cache('analise', cache.hash_arquivo(args.dados), NUM_FAIXAS_PRECO,
+                                      MODO_INCREMENTAL or bool(TAMANHO_BLOCO), perguntas,
+                                      cache.assinatura_codigo(carregamento, colunar, agregacao, sentimento,
+                                                              classificacao_abc, elasticidade, segmentacao,
+                                                              distribuicao, __import__(__name__)))
+            analise = cache.carregar(chave)
+            # Os arquivos exportados pelas perguntas (classes ABC, elasticidade, segmentos) são recriados
+            # a partir das cópias guardadas com o resultado; se alguma sumiu do cache, recalcula tudo
+            if analise is not None and not cache.restaurar_exportacoes(chave, _exportacoes(analise)):
+                analise = None
+            span['acerto'] = analise is not None
+    if analise is None:
+        analise = analisar(args.dados, telemetria, perguntas)
+        if usar_cache:
+            cache.salvar(chave, analise)
+            cache.guardar_exportacoes(chave, _exportacoes(analise))
+
+    graficos = []
+    for numero in perguntas:
+        titulo = PERGUNTAS[numero][0]
+        resultado = analise['perguntas'][numero]
+        print(f"\n{titulo}")
+        for linha in resultado['insights']:
+            print(f"  {linha}")
+        if not resultado['insights']:
+            print("  (dados necessários indisponíveis neste modo de execução)")
+        graficos += resultado['graficos']
+
+    # Imagens cujo conteúdo não mudou são copiadas do cache; as demais são renderizadas em paralelo
+    salvos = set() if args.sem_graficos else set(renderizar(graficos, telemetria, usar_cache, args.workers))
+    if usar_cache:
+        cache.descartar_excedente()
+
+    # Arquivos gravados nesta execução por cada pergunta (gráficos salvos e exportações calculadas ou
+    # restauradas do cache) contabilizados no span dela; sobras de execuções anteriores não contam
+    for numero, resultado in analise['perguntas'].items():
+        telemetria.registrar_saida(f'pergunta_{numero}', [spec['arquivo'] for spec in resultado['graficos']
+                                                          if spec['arquivo'] in salvos]
+                                   + resultado.get('arquivos', []))
+
+    # O relatório usa receita, preço e nota globais: só sai quando as perguntas escolhidas os calcularam
+    if all(coluna in analise['globais'] for coluna in ('Receita_Estimada', 'Preço', 'Nota')):
+        with telemetria.span('relatorio'):
+            relatorio_executivo(analise['globais'])
+
+    print("\n" + "=" * 80)
+    if args.sem_graficos:
+        print("✓ ANÁLISE COMPLETA! (gráficos desativados)")
+    else:
+        print(f"✓ ANÁLISE COMPLETA! {len(salvos)} gráficos estratégicos gerados.")
+    print("=" * 80)
+
+    if args.telemetria:
+        telemetria.exportar(args.telemetria)
+        print(f"⏱️ Telemetria salva em {args.telemetria}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""Suíte de benchmark: tempo, pico de RSS e alocações por etapa da análise.
+
+Gera datasets sintéticos com o mesmo esquema de ecommerce_limpo.csv (reamostrando linhas reais e
+perturbando os preços) e mede separadamente carregamento, sentimento, agregação, o cálculo de cada
+pergunta, a renderização dos gráficos de cada pergunta e o relatório executivo. Cada tamanho roda
+num subprocesso, para que o pico de memória de um não contamine o outro (e um estouro de memória
+em 10M de linhas não derrube a suíte). Os resultados vão para um JSON comparável entre versões:
+
+    python benchmark.py                          # 10k, 100k, 1M e 10M linhas
+    python benchmark.py --tamanhos 10000,100000 --saida atual.json --comparar anterior.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from telemetria import rss_atual
+
+ARQUIVO_MODELO = 'ecommerce_limpo.csv'
+DIRETORIO_DADOS = '.bench_dados'
+ARQUIVO_RESULTADOS = 'benchmark_resultados.json'
+ARQUIVO_MEDICOES = 'medicoes.json'
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000, 10_000_000]
+LINHAS_POR_BLOCO = 100_000
+SEMENTE = 42
+_INTERVALO_AMOSTRAGEM = 0.005
+
+
+# ============================================================================
+# DATASETS SINTÉTICOS
+# ============================================================================
+def gerar_dataset_sintetico(linhas, caminho, modelo=ARQUIVO_MODELO, semente=SEMENTE):
+    """Escreve `linhas` produtos sintéticos em `caminho`, bloco a bloco.
+
+    As linhas são reamostradas do dataset real (mantendo tipos e a relação entre colunas); o preço
+    recebe um ruído log-normal e Preço_Final/Receita_Estimada são recalculados a partir dele.
+    """
+    base = pd.read_csv(modelo)
+    rng = np.random.default_rng(semente)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8', newline='') as arquivo:
+        for inicio in range(0, linhas, LINHAS_POR_BLOCO):
+            tamanho = min(LINHAS_POR_BLOCO, linhas - inicio)
+            bloco = base.iloc[rng.integers(0, len(base), tamanho)].reset_index(drop=True)
+            bloco['Preço'] = (bloco['Preço'] * rng.lognormal(0.0, 0.1, tamanho)).round(2)
+            bloco['Preço_Final'] = bloco['Preço'] * (1 - bloco['Desconto'] / 100)
+            bloco['Receita_Estimada'] = bloco['Preço_Final'] * bloco['Qtd_Vendidos_Numeric']
+            bloco.to_csv(arquivo, header=inicio == 0, index=False)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def dataset_sintetico(linhas, diretorio=DIRETORIO_DADOS, semente=SEMENTE):
+    """Caminho do dataset de `linhas` linhas, gerado só na primeira vez."""
+    caminho = os.path.abspath(os.path.join(diretorio, f'sintetico_{linhas}_{semente}.csv'))
+    if not os.path.exists(caminho):
+        os.makedirs(diretorio, exist_ok=True)
+        gerar_dataset_sintetico(linhas, caminho, semente=semente)
+    return caminho
+
+
+# ============================================================================
+# MEDIÇÃO POR ETAPA
+# ============================================================================
+class _AmostradorRSS(threading.Thread):
+    """Lê o RSS periodicamente em segundo plano e guarda o máximo observado."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.pico = rss_atual()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(_INTERVALO_AMOSTRAGEM):
+            self.pico = max(self.pico, rss_atual())
+
+    def encerrar(self):
+        self._parar.set()
+        self.join()
+        return max(self.pico, rss_atual())
+
+
+class Medidor:
+    """Registra tempo de parede, pico de RSS e pico de memória alocada (tracemalloc) de cada etapa."""
+
+    def __init__(self, alocacoes=True):
+        self.alocacoes = alocacoes
+        self.etapas = []
+
+    @contextlib.contextmanager
+    def etapa(self, nome, linhas=None):
+        if self.alocacoes:
+            tracemalloc.start()
+        amostrador = _AmostradorRSS()
+        amostrador.start()
+        rss_inicial = rss_atual()
+        registro = {'etapa': nome, 'linhas': linhas}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception as erro:
+            registro['erro'] = f'{type(erro).__name__}: {erro}'
+            raise
+        finally:
+            registro['segundos'] = time.perf_counter() - inicio
+            pico = amostrador.encerrar()
+            registro['pico_rss_mb'] = pico / 2 ** 20
+            registro['delta_rss_mb'] = (rss_atual() - rss_inicial) / 2 ** 20
+            if self.alocacoes:
+                atual, pico_alocado = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                registro['pico_alocado_mb'] = pico_alocado / 2 ** 20
+                registro['saldo_alocado_mb'] = atual / 2 ** 20
+            self.etapas.append(registro)
+
+
+# ============================================================================
+# EXECUÇÃO DE UM TAMANHO (NO SUBPROCESSO)
+# ============================================================================
+def medir_analise(caminho, medidor):
+    """Executa a análise completa sobre `caminho`, etapa por etapa, registrando cada uma em `medidor`."""
+    import analise_estrategica_ecommerce as analise
+    import graficos
+    from agregacao import agregar, tabelas_por_grupo, estatisticas_globais
+    from carregamento import carregar_dataset
+    from colunar import carregar_colunar, construir
+    from sentimento import pontuar_reviews
+
+    graficos.configurar_estilo()
+
+    # A cópia colunar é construída uma vez por versão do CSV; medida à parte da leitura
+    if analise.USAR_COLUNAR:
+        with medidor.etapa('construcao_colunar'):
+            construir(caminho)
+    with medidor.etapa('carregamento') as registro:
+        df = carregar_colunar(caminho) if analise.USAR_COLUNAR else carregar_dataset(caminho)
+        registro['linhas'] = len(df)
+    linhas = registro['linhas']
+
+    with medidor.etapa('sentimento', linhas):
+        df = df.join(pontuar_reviews(df))
+
+    with medidor.etapa('agregacao', linhas):
+        estado = agregar(df, {'Faixa_Preço_Detalhada': pd.cut(df['Preço'], bins=analise.NUM_FAIXAS_PRECO)})
+        tabelas = tabelas_por_grupo(estado, analise.NUM_FAIXAS_PRECO)
+        globais = estatisticas_globais(estado)
+
+    for numero, (_, funcao) in analise.PERGUNTAS.items():
+        with medidor.etapa(f'pergunta_{numero}', linhas):
+            resultado = funcao(df, estado, tabelas, globais)
+        with medidor.etapa(f'graficos_pergunta_{numero}', linhas) as registro:
+            registro['graficos'] = len(resultado['graficos'])
+            for spec in resultado['graficos']:
+                graficos.renderizar(spec)
+
+    with medidor.etapa('relatorio', linhas), contextlib.redirect_stdout(io.StringIO()):
+        analise.relatorio_executivo(globais)
+
+
+def _executar_tamanho(linhas, alocacoes):
+    """Roda um tamanho num subprocesso e devolve o registro (com erro se o processo falhar)."""
+    caminho = dataset_sintetico(linhas)
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory(prefix='bench_') as saida:
+        comando = [sys.executable, os.path.join(raiz, 'benchmark.py'), '--medir', caminho]
+        if not alocacoes:
+            comando.append('--sem-alocacoes')
+        # Imagens e arquivos exportados ficam no diretório temporário; os módulos vêm da raiz do repositório
+        ambiente = {**os.environ, 'MPLBACKEND': 'Agg',
+                    'PYTHONPATH': os.pathsep.join(filter(None, [raiz, os.environ.get('PYTHONPATH')]))}
+        processo = subprocess.run(comando, cwd=saida, env=ambiente, capture_output=True, text=True)
+        # As etapas concluídas são gravadas mesmo quando uma delas falha
+        try:
+            with open(os.path.join(saida, ARQUIVO_MEDICOES), encoding='utf-8') as arquivo:
+                resultado = {'linhas': linhas, 'etapas': json.load(arquivo)}
+        except OSError:
+            resultado = {'linhas': linhas, 'etapas': []}
+    if processo.returncode != 0:
+        ultima = processo.stderr.strip().splitlines()[-1:]
+        resultado['erro'] = ultima[0] if ultima else f'código de saída {processo.returncode}'
+    return resultado
+
+
+# ============================================================================
+# RESULTADOS E COMPARAÇÃO
+# ============================================================================
+def _versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(atual, anterior):
+    """Imprime a razão de tempo e de pico de RSS (atual / anterior) de cada etapa em comum."""
+    referencia = {(r['linhas'], e['etapa']): e
+                  for r in anterior['resultados'] for e in r.get('etapas', [])}
+    print(f"\n{'linhas':>10}  {'etapa':<24}{'tempo':>10}{'RSS':>10}")
+    for resultado in atual['resultados']:
+        for etapa in resultado.get('etapas', []):
+            antes = referencia.get((resultado['linhas'], etapa['etapa']))
+            if antes is None or not antes['segundos']:
+                continue
+            print(f"{resultado['linhas']:>10}  {etapa['etapa']:<24}"
+                  f"{etapa['segundos'] / antes['segundos']:>9.2f}x{etapa['pico_rss_mb'] / antes['pico_rss_mb']:>9.2f}x")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', default=','.join(map(str, TAMANHOS_PADRAO)),
+                        help='número de linhas de cada dataset sintético, separados por vírgula')
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS, help='arquivo JSON de resultados')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--sem-alocacoes', action='store_true',
+                        help='não rastrear alocações (tracemalloc deixa as etapas mais lentas)')
+    parser.add_argument('--medir', help=argparse.SUPPRESS)
+    args = parser.parse_args(argumentos)
+
+    if args.medir:
+        medidor = Medidor(not args.sem_alocacoes)
+        try:
+            medir_analise(args.medir, medidor)
+        finally:
+            with open(ARQUIVO_MEDICOES, 'w', encoding='utf-8') as arquivo:
+                json.dump(medidor.etapas, arquivo)
+        return
+
+    resultados = {'versao': _versao_codigo(), 'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                  'python': platform.python_version(), 'plataforma': platform.platform(),
+                  'alocacoes': not args.sem_alocacoes, 'resultados': []}
+    for linhas in (int(t) for t in args.tamanhos.split(',')):
+        print(f"⏱️ {linhas:,} linhas...", flush=True)
+        resultado = _executar_tamanho(linhas, not args.sem_alocacoes)
+        resultados['resultados'].append(resultado)
+        for etapa in resultado['etapas']:
+            print(f"  {etapa['etapa']:<24}{etapa['segundos']:>9.3f}s{etapa['pico_rss_mb']:>10.1f} MB"
+                  + (f"  ERRO: {etapa['erro']}" if 'erro' in etapa else ''))
+        if 'erro' in resultado:
+            print(f"  AVISO: execução interrompida ({resultado['erro']})")
+        # Salva a cada tamanho: uma execução interrompida ainda deixa os resultados anteriores
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+    print(f"✓ Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            comparar(resultados, json.load(arquivo))
+
+
+if __name__ == '__main__':
+    main()
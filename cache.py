@@ -0,0 +1,158 @@
+"""Cache em disco endereçado por conteúdo para resultados das perguntas e imagens renderizadas.
+
+As chaves combinam o hash do arquivo de entrada, os parâmetros da análise e o hash do código-fonte
+que produz o resultado, então qualquer mudança em dados ou código invalida a entrada naturalmente.
+O diretório tem tamanho limitado e descarta primeiro as entradas usadas há mais tempo (LRU).
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO_CACHE = '.cache_analise'
+LIMITE_CACHE_BYTES = 512 * 1024 * 1024
+_BLOCO_LEITURA = 1024 * 1024
+
+
+def hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(_BLOCO_LEITURA), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def assinatura_codigo(*modulos):
+    """Hash do código-fonte dos módulos que produzem um resultado."""
+    h = hashlib.sha256()
+    for modulo in modulos:
+        with open(modulo.__file__, 'rb') as arquivo:
+            h.update(arquivo.read())
+    return h.hexdigest()
+
+
+def chave_cache(*partes):
+    texto = json.dumps(partes, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _caminho(chave, extensao, diretorio):
+    return os.path.join(diretorio, chave[:2], chave + extensao)
+
+
+def _tocar(caminho):
+    # Atualiza o mtime: é ele que define a ordem de descarte do LRU
+    os.utime(caminho, None)
+
+
+def carregar(chave, diretorio=DIRETORIO_CACHE):
+    """Devolve o objeto salvo sob a chave, ou None quando ausente/ilegível."""
+    caminho = _caminho(chave, '.pkl', diretorio)
+    try:
+        with open(caminho, 'rb') as arquivo:
+            objeto = pickle.load(arquivo)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    _tocar(caminho)
+    return objeto
+
+
+def salvar(chave, objeto, diretorio=DIRETORIO_CACHE):
+    caminho = _caminho(chave, '.pkl', diretorio)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        pickle.dump(objeto, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+
+
+def _hash_conteudo(h, valor):
+    # Hash estrutural: os bytes do pickle de objetos pandas variam entre execuções com o mesmo conteúdo
+    if isinstance(valor, dict):
+        for chave in sorted(valor):
+            h.update(repr(chave).encode('utf-8'))
+            _hash_conteudo(h, valor[chave])
+    elif isinstance(valor, (list, tuple)):
+        h.update(f'{type(valor).__name__}{len(valor)}'.encode('ascii'))
+        for item in valor:
+            _hash_conteudo(h, item)
+    elif isinstance(valor, (pd.Series, pd.DataFrame, pd.Index)):
+        h.update(repr((type(valor).__name__, getattr(valor, 'name', None), valor.shape)).encode('utf-8'))
+        if isinstance(valor, pd.DataFrame):
+            h.update(repr(list(valor.columns)).encode('utf-8'))
+            h.update(repr(list(valor.dtypes.astype(str))).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(valor.astype(str) if isinstance(valor, pd.IntervalIndex) else valor,
+                                            index=not isinstance(valor, pd.Index)).values.tobytes())
+        if not isinstance(valor, pd.Index):
+            _hash_conteudo(h, valor.index.astype(str) if isinstance(valor.index, pd.IntervalIndex) else valor.index)
+    elif isinstance(valor, np.ndarray):
+        h.update(repr((valor.dtype.str, valor.shape)).encode('ascii'))
+        h.update(np.ascontiguousarray(valor).tobytes() if valor.dtype != object else repr(valor.tolist()).encode())
+    else:
+        h.update(repr(valor).encode('utf-8'))
+
+
+def chave_grafico(spec, assinatura):
+    """Chave de uma imagem: conteúdo da spec (dados incluídos) + assinatura do código de desenho."""
+    h = hashlib.sha256(assinatura.encode('ascii'))
+    _hash_conteudo(h, spec)
+    return h.hexdigest()
+
+
+def restaurar_imagem(spec, assinatura, diretorio=DIRETORIO_CACHE):
+    """Copia a imagem em cache para spec['arquivo']; devolve False se não houver entrada."""
+    caminho = _caminho(chave_grafico(spec, assinatura), '.png', diretorio)
+    if not os.path.exists(caminho):
+        return False
+    shutil.copyfile(caminho, spec['arquivo'])
+    _tocar(caminho)
+    return True
+
+
+def guardar_imagem(spec, assinatura, diretorio=DIRETORIO_CACHE):
+    caminho = _caminho(chave_grafico(spec, assinatura), '.png', diretorio)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    shutil.copyfile(spec['arquivo'], caminho)
+
+
+def _caminho_exportacao(chave, arquivo, diretorio):
+    return _caminho(chave_cache(chave, os.path.basename(arquivo)), os.path.splitext(arquivo)[1], diretorio)
+
+
+def guardar_exportacoes(chave, arquivos, diretorio=DIRETORIO_CACHE):
+    """Guarda cópias dos arquivos exportados junto com o resultado salvo sob `chave`."""
+    for arquivo in arquivos:
+        caminho = _caminho_exportacao(chave, arquivo, diretorio)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        shutil.copyfile(arquivo, caminho)
+
+
+def restaurar_exportacoes(chave, arquivos, diretorio=DIRETORIO_CACHE):
+    """Recria os arquivos exportados de um resultado em cache; False (nada copiado) se faltar algum."""
+    caminhos = [_caminho_exportacao(chave, arquivo, diretorio) for arquivo in arquivos]
+    if not all(os.path.exists(caminho) for caminho in caminhos):
+        return False
+    for caminho, arquivo in zip(caminhos, arquivos):
+        shutil.copyfile(caminho, arquivo)
+        _tocar(caminho)
+    return True
+
+
+def descartar_excedente(diretorio=DIRETORIO_CACHE, limite_bytes=LIMITE_CACHE_BYTES):
+    """Remove as entradas menos recentemente usadas até o cache caber no limite (chamar ao fim da execução)."""
+    entradas = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            info = os.stat(caminho)
+            entradas.append((info.st_mtime, info.st_size, caminho))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        os.remove(caminho)
+        total -= tamanho
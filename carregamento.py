@@ -0,0 +1,128 @@
+"""Carregamento do dataset limpo com poda de colunas, tipos compactos e leitura em blocos."""
+import io
+import os
+
+import pandas as pd
+
+ARQUIVO_LIMPO = 'ecommerce_limpo.csv'
+TAMANHO_BLOCO_PADRAO = 100_000
+
+# Tipos compactos: categorias para texto repetitivo, float32 para medidas de baixa precisão.
+# Receita e quantidade ficam em float64 porque são somadas sobre milhões de linhas.
+TIPOS_COLUNAS = {
+    'Marca': 'category',
+    'Material': 'category',
+    'Gênero': 'category',
+    'Temporada': 'category',
+    'Preço': 'float32',
+    'Nota': 'float32',
+    'Desconto': 'float32',
+    'N_Avaliações': 'float32',
+    'Preço_Final': 'float32',
+    'Qtd_Vendidos_Numeric': 'float64',
+    'Receita_Estimada': 'float64',
+}
+
+# Colunas que cada pergunta realmente lê (reviews e colunas _MinMax/_Cod/_Freq ficam de fora)
+COLUNAS_POR_PERGUNTA = {
+    1: ['Marca', 'Receita_Estimada', 'Qtd_Vendidos_Numeric', 'Preço', 'Nota'],
+    2: ['Material', 'Preço', 'Nota', 'Qtd_Vendidos_Numeric'],
+    3: ['Temporada', 'Receita_Estimada', 'Qtd_Vendidos_Numeric', 'Preço'],
+    4: ['Desconto', 'Qtd_Vendidos_Numeric', 'Receita_Estimada', 'Marca', 'Material', 'Temporada'],
+    5: ['Review1', 'Review2', 'Review3', 'Marca'],
+    6: ['Receita_Estimada', 'Marca', 'Temporada'],
+    7: ['Preço', 'Qtd_Vendidos_Numeric', 'Receita_Estimada'],
+    8: ['Nota', 'N_Avaliações', 'Desconto', 'Preço', 'Qtd_Vendidos_Numeric',
+        'Receita_Estimada', 'Preço_Final'],
+    9: ['Preço', 'Nota'],
+    10: ['Nota_MinMax', 'Preço_MinMax', 'Desconto_MinMax', 'N_Avaliações_MinMax', 'Marca_Freq',
+         'Receita_Estimada', 'Nota', 'Preço', 'Título', 'Marca'],
+}
+
+# Faixas de desconto usadas na Pergunta 4
+FAIXAS_DESCONTO_BINS = [0, 10, 20, 30, 50, 100]
+FAIXAS_DESCONTO_LABELS = ['0-10%', '10-20%', '20-30%', '30-50%', '>50%']
+
+
+def colunas_necessarias(perguntas=None):
+    """União ordenada das colunas lidas pelas perguntas informadas (todas por padrão)."""
+    perguntas = COLUNAS_POR_PERGUNTA if perguntas is None else perguntas
+    colunas = []
+    for pergunta in perguntas:
+        for coluna in COLUNAS_POR_PERGUNTA[pergunta]:
+            if coluna not in colunas:
+                colunas.append(coluna)
+    return colunas
+
+
+def _argumentos_leitura(perguntas, colunas):
+    colunas = colunas_necessarias(perguntas) if colunas is None else list(colunas)
+    # usecols como função tolera colunas ausentes no arquivo (as perguntas checam df.columns)
+    return {
+        'usecols': lambda coluna: coluna in colunas,
+        'dtype': {c: t for c, t in TIPOS_COLUNAS.items() if c in colunas},
+    }
+
+
+def carregar_dataset(caminho=ARQUIVO_LIMPO, perguntas=None, colunas=None):
+    """Lê o CSV limpo de uma vez, apenas com as colunas necessárias e tipos compactos."""
+    return pd.read_csv(caminho, **_argumentos_leitura(perguntas, colunas))
+
+
+class _Trecho(io.RawIOBase):
+    """Arquivo aberto visto só até o byte `fim` (o que for acrescentado depois não é lido)."""
+
+    def __init__(self, arquivo, fim):
+        self._arquivo, self._fim = arquivo, fim
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        dados = self._arquivo.read(max(0, min(len(buffer), self._fim - self._arquivo.tell())))
+        buffer[:len(dados)] = dados
+        return len(dados)
+
+
+def fim_linhas_completas(caminho, tamanho=None):
+    """Byte logo após a última quebra de linha dos primeiros `tamanho` bytes (padrão: o arquivo todo).
+
+    É até onde a leitura é segura enquanto outro processo acrescenta linhas: uma linha pela metade
+    no fim do arquivo fica para a próxima leitura.
+    """
+    tamanho = os.path.getsize(caminho) if tamanho is None else tamanho
+    with open(caminho, 'rb') as arquivo:
+        fim = tamanho
+        while fim > 0:
+            inicio = max(0, fim - 64 * 1024)
+            arquivo.seek(inicio)
+            posicao = arquivo.read(fim - inicio).rfind(b'\n')
+            if posicao >= 0:
+                return inicio + posicao + 1
+            fim = inicio
+    return 0
+
+
+def ler_em_blocos(caminho=ARQUIVO_LIMPO, perguntas=None, colunas=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+                  inicio=0, fim=None):
+    """Itera sobre o CSV limpo em blocos de `tamanho_bloco` linhas já tipados e podados.
+
+    Com `inicio` > 0 a leitura começa nesse byte (início de uma linha), reaproveitando o cabeçalho
+    do arquivo: é assim que o modo incremental lê só as linhas acrescentadas. Com `fim` a leitura
+    para nesse byte, mesmo que o arquivo cresça durante ela.
+    """
+    argumentos = _argumentos_leitura(perguntas, colunas)
+    if fim is not None and fim <= inicio:
+        return
+    with open(caminho, 'rb') as arquivo:
+        if inicio:
+            argumentos.update(header=None, names=pd.read_csv(caminho, nrows=0).columns.tolist())
+            arquivo.seek(inicio)
+        fonte = arquivo if fim is None else io.BufferedReader(_Trecho(arquivo, fim))
+        with pd.read_csv(fonte, chunksize=tamanho_bloco, **argumentos) as leitor:
+            for bloco in leitor:
+                yield bloco
+
+
+def faixa_desconto(desconto):
+    return pd.cut(desconto, bins=FAIXAS_DESCONTO_BINS, labels=FAIXAS_DESCONTO_LABELS)
@@ -0,0 +1,106 @@
+"""Curva ABC escalável: classes por produto sem ordenar o catálogo inteiro e curva de Pareto amostrada.
+
+A classificação global só ordena o topo do catálogo (np.argpartition), que costuma ser pequeno; a
+classificação por grupo (marca, temporada) ordena uma única vez por (grupo, receita). A curva do
+gráfico vem do histograma de receita do estado agregado, então o custo de desenhá-la não depende
+do número de produtos.
+"""
+import numpy as np
+
+from agregacao import curva_abc
+
+LIMITES_ABC = (80, 95)
+CLASSES = np.array(['A', 'B', 'C'])
+ARQUIVO_CLASSES = 'classes_abc.npz'
+# Posição original no CSV, quando as linhas chegam reordenadas (fatias): exportada junto com as classes
+COLUNA_LINHA = 'Linha_CSV'
+PONTOS_CURVA = 100
+AMOSTRA_TOPO = 10_000
+
+
+def classificar_abc(receita, limites=LIMITES_ABC):
+    """Classe de cada produto (0 = A, 1 = B, 2 = C), na ordem recebida.
+
+    Separa com np.argpartition um topo de k produtos (k estimado numa amostra, dobrado até o topo
+    passar do limite da classe B); só esse topo é ordenado. Empates na fronteira podem trocar de produto, não de contagem.
+    """
+    receita = np.nan_to_num(np.asarray(receita, dtype='float64'))
+    n = len(receita)
+    classes = np.full(n, 2, dtype=np.uint8)
+    total = receita.sum()
+    if n == 0 or total <= 0:
+        return classes
+
+    # Tamanho inicial do topo estimado numa amostra (com folga); se não bastar, dobra
+    alvo_b = total * limites[1] / 100
+    negativa = -receita
+    amostra = np.sort(receita[::max(1, n // AMOSTRA_TOPO)])[::-1]
+    fracao = (np.searchsorted(np.cumsum(amostra), amostra.sum() * limites[1] / 100) + 1) / len(amostra)
+    k = min(n, max(64, int(fracao * n * 1.1)))
+    while True:
+        topo = np.argpartition(negativa, k - 1)[:k] if k < n else np.arange(n)
+        if k == n or receita[topo].sum() > alvo_b:
+            break
+        k = min(n, k * 2)
+
+    ordem = topo[np.argsort(negativa[topo], kind='stable')]
+    percentual = np.cumsum(receita[ordem]) / total * 100
+    classes[ordem[percentual <= limites[1]]] = 1
+    classes[ordem[percentual <= limites[0]]] = 0
+    return classes
+
+
+def classificar_abc_por_grupo(receita, codigos, limites=LIMITES_ABC):
+    """Classe ABC de cada produto dentro do seu grupo (códigos -1 ficam como C), numa única ordenação."""
+    receita = np.nan_to_num(np.asarray(receita, dtype='float64'))
+    codigos = np.asarray(codigos)
+    classes = np.full(len(receita), 2, dtype=np.uint8)
+    validos = np.flatnonzero(codigos >= 0)
+    if not len(validos):
+        return classes
+
+    ordem = validos[np.lexsort((-receita[validos], codigos[validos]))]
+    codigos_ordenados, receita_ordenada = codigos[ordem], receita[ordem]
+    acumulada = np.cumsum(receita_ordenada)
+    inicio = np.searchsorted(codigos_ordenados, codigos_ordenados, side='left')
+    dentro_do_grupo = acumulada - (acumulada[inicio] - receita_ordenada[inicio])
+    total_grupo = np.bincount(codigos_ordenados, weights=receita_ordenada)[codigos_ordenados]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentual = dentro_do_grupo / total_grupo * 100
+    classes[ordem] = np.where(percentual <= limites[0], 0, np.where(percentual <= limites[1], 1, 2))
+    return classes
+
+
+def contar_classes(classes, codigos=None, num_grupos=None):
+    """Produtos por classe; com códigos de grupo, matriz grupos x classes."""
+    if codigos is None:
+        return np.bincount(classes, minlength=3)
+    validos = codigos >= 0
+    combinados = codigos[validos].astype(np.int64) * 3 + classes[validos]
+    num_grupos = int(codigos.max()) + 1 if num_grupos is None else num_grupos
+    return np.bincount(combinados, minlength=num_grupos * 3).reshape(num_grupos, 3)
+
+
+def exportar_classes(caminho=ARQUIVO_CLASSES, **classes):
+    """Salva as classes por produto (uint8, na ordem das linhas analisadas) num .npz compactado.
+
+    Sem o array `linha` essa é a ordem das linhas do CSV; com ele, `linha` dá a posição de cada produto no CSV.
+    """
+    np.savez_compressed(caminho, rotulos=CLASSES, **classes)
+
+
+def curva_pareto_amostrada(estado, pontos=PONTOS_CURVA):
+    """Curva de Pareto em `pontos` quantis de produtos, a partir do histograma de receita.
+
+    Devolve (posições em número de produtos, % acumulado em cada posição, receita média por
+    produto em cada intervalo) — tamanho fixo, qualquer que seja o catálogo.
+    """
+    _, produtos_acumulados, percentual = curva_abc(estado)
+    total_receita = estado['histogramas']['Receita_Estimada']['soma']['Receita_Estimada'].sum()
+    x = np.concatenate([[0], produtos_acumulados])
+    y = np.concatenate([[0.0], percentual])
+    posicoes = np.linspace(0, x[-1], pontos + 1)
+    curva = np.interp(posicoes, x, y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        receita_media = np.diff(curva) / 100 * total_receita / np.diff(posicoes)
+    return posicoes, curva, np.nan_to_num(receita_media)
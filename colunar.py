@@ -0,0 +1,162 @@
+"""Cópia colunar binária do dataset limpo, carregada por memory-map.
+
+Cada coluna do CSV vira um arquivo binário num diretório ao lado dele (`ecommerce_limpo.colunas/`):
+- numéricas: o array cru no tipo de TIPOS_COLUNAS (float64 para as demais);
+- Marca/Material/Gênero/Temporada: códigos inteiros (int8/int16/int32, como o pandas usaria) e
+  o dicionário de categorias, ordenado, no manifesto;
+- texto (reviews, título...): o texto da coluna inteira separado por \\x1f e uma máscara de nulos.
+
+O manifesto guarda tamanho e mtime do CSV de origem; quando eles mudam a cópia é reconstruída, bloco
+a bloco. Colunas numéricas e categóricas são abertas com np.memmap (cópia na escrita) e entram no
+DataFrame sem cópia; o texto só é lido quando alguma coluna de texto é pedida.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from carregamento import ARQUIVO_LIMPO, TAMANHO_BLOCO_PADRAO, TIPOS_COLUNAS, colunas_necessarias
+from limpeza import COLUNAS_TEXTO
+
+VERSAO_COLUNAR = 2
+# Texto fixado como str na leitura: inferido por bloco, uma coluna vazia no primeiro bloco viraria float
+COLUNAS_TEXTO_LIMPO = COLUNAS_TEXTO + ['Faixa_Preço', 'Classificação_Nota']
+MANIFESTO = 'manifesto.json'
+SEPARADOR = '\x1f'
+
+
+def diretorio_colunar(caminho):
+    return os.path.splitext(caminho)[0] + '.colunas'
+
+
+def _origem(caminho):
+    info = os.stat(caminho)
+    return {'bytes': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def _ler_manifesto(diretorio):
+    try:
+        with open(os.path.join(diretorio, MANIFESTO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def atualizado(caminho, diretorio=None):
+    """True quando a cópia colunar existe e corresponde ao CSV atual."""
+    manifesto = _ler_manifesto(diretorio or diretorio_colunar(caminho))
+    return (manifesto is not None and manifesto['versao'] == VERSAO_COLUNAR
+            and manifesto['origem'] == _origem(caminho))
+
+
+def _tipo_codigos(num_categorias):
+    # Mesmo tipo que o pandas escolhe para os códigos: assim Categorical.from_codes não copia
+    for tipo in (np.int8, np.int16, np.int32):
+        if num_categorias < np.iinfo(tipo).max:
+            return np.dtype(tipo)
+    return np.dtype(np.int64)
+
+
+def construir(caminho=ARQUIVO_LIMPO, diretorio=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """(Re)constrói a cópia colunar de `caminho` lendo o CSV em blocos; devolve o manifesto."""
+    diretorio = diretorio or diretorio_colunar(caminho)
+    temporario = diretorio + '.tmp'
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    origem = _origem(caminho)
+
+    colunas, arquivos, dicionarios, linhas = {}, {}, {}, 0
+    categoricas = [c for c, t in TIPOS_COLUNAS.items() if t == 'category']
+    tipos = {c: t for c, t in TIPOS_COLUNAS.items() if t != 'category'}
+    textos = {c: 'str' for c in COLUNAS_TEXTO_LIMPO if c not in TIPOS_COLUNAS}
+    try:
+        with pd.read_csv(caminho, chunksize=tamanho_bloco, dtype={**tipos, **textos}) as leitor:
+            for bloco in leitor:
+                for coluna in bloco.columns:
+                    if coluna not in colunas:
+                        arquivo = f'c{len(colunas):03d}'
+                        if coluna in categoricas:
+                            colunas[coluna] = {'tipo': 'categoria', 'arquivo': arquivo}
+                            dicionarios[coluna] = {}
+                        elif coluna not in textos and pd.api.types.is_numeric_dtype(bloco[coluna]):
+                            colunas[coluna] = {'tipo': 'numerica', 'arquivo': arquivo,
+                                               'dtype': np.dtype(tipos.get(coluna, 'float64')).str}
+                        else:
+                            colunas[coluna] = {'tipo': 'texto', 'arquivo': arquivo}
+                        arquivos[coluna] = [open(os.path.join(temporario, arquivo + sufixo), 'wb')
+                                            for sufixo in (('.bin', '.nulo') if colunas[coluna]['tipo'] == 'texto'
+                                                           else ('.bin',))]
+                    _gravar_bloco(bloco[coluna], colunas[coluna], arquivos[coluna], dicionarios.get(coluna), linhas)
+                linhas += len(bloco)
+    finally:
+        for abertos in arquivos.values():
+            for arquivo in abertos:
+                arquivo.close()
+
+    # Categorias em ordem lexicográfica (como em read_csv com dtype='category') e códigos no tipo final
+    for coluna, dicionario in dicionarios.items():
+        categorias = np.array(list(dicionario), dtype=object)
+        ordem = np.argsort(categorias.astype(str), kind='stable')
+        remapear = np.empty(len(categorias) + 1, dtype=np.int64)
+        remapear[ordem] = np.arange(len(categorias))
+        remapear[-1] = -1
+        caminho_codigos = os.path.join(temporario, colunas[coluna]['arquivo'] + '.bin')
+        codigos = np.fromfile(caminho_codigos, dtype=np.int32)
+        tipo = _tipo_codigos(len(categorias))
+        remapear[codigos].astype(tipo).tofile(caminho_codigos)
+        colunas[coluna].update(dtype=tipo.str, categorias=categorias[ordem].tolist())
+
+    manifesto = {'versao': VERSAO_COLUNAR, 'origem': origem, 'linhas': linhas, 'colunas': colunas}
+    with open(os.path.join(temporario, MANIFESTO), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.replace(temporario, diretorio)
+    return manifesto
+
+
+def _gravar_bloco(serie, especificacao, arquivos, dicionario, inicio):
+    if especificacao['tipo'] == 'numerica':
+        arquivos[0].write(serie.to_numpy(dtype=especificacao['dtype']).tobytes())
+    elif especificacao['tipo'] == 'categoria':
+        # Dicionário global em ordem de aparição; -1 (nulo) vira o último índice do remapeamento final
+        codigos_bloco, valores = pd.factorize(serie)
+        globais = np.array([dicionario.setdefault(v, len(dicionario)) for v in valores] + [-1], dtype=np.int32)
+        arquivos[0].write(globais[codigos_bloco].tobytes())
+    else:
+        nulos = serie.isna().to_numpy()
+        textos = serie.astype(object).where(~nulos, '').astype(str).str.replace(SEPARADOR, ' ', regex=False)
+        arquivos[0].write(((SEPARADOR if inicio else '') + SEPARADOR.join(textos)).encode('utf-8'))
+        arquivos[1].write(nulos.tobytes())
+
+
+def _abrir(diretorio, especificacao, linhas):
+    caminho = os.path.join(diretorio, especificacao['arquivo'] + '.bin')
+    tipo = np.dtype(especificacao['dtype'])
+    if linhas == 0:
+        return np.empty(0, dtype=tipo)
+    # view como ndarray: continua apontando para o mapeamento, sem a subclasse memmap nos resultados
+    return np.memmap(caminho, dtype=tipo, mode='c', shape=(linhas,)).view(np.ndarray)
+
+
+def _coluna(diretorio, especificacao, linhas):
+    if especificacao['tipo'] == 'numerica':
+        return _abrir(diretorio, especificacao, linhas)
+    if especificacao['tipo'] == 'categoria':
+        tipo = pd.CategoricalDtype(pd.Index(especificacao['categorias'], dtype='str'))
+        return pd.Categorical.from_codes(_abrir(diretorio, especificacao, linhas), dtype=tipo, validate=False)
+    # Lido como bytes: em modo texto um \r\n dentro de um review viraria \n
+    with open(os.path.join(diretorio, especificacao['arquivo'] + '.bin'), 'rb') as arquivo:
+        textos = np.array(arquivo.read().decode('utf-8').split(SEPARADOR) if linhas else [], dtype=object)
+    textos[np.fromfile(os.path.join(diretorio, especificacao['arquivo'] + '.nulo'), dtype=bool)] = None
+    return pd.array(textos, dtype='str')
+
+
+def carregar_colunar(caminho=ARQUIVO_LIMPO, perguntas=None, colunas=None, diretorio=None):
+    """Mesmo contrato de carregar_dataset, lendo da cópia colunar (reconstruída se o CSV mudou)."""
+    diretorio = diretorio or diretorio_colunar(caminho)
+    manifesto = _ler_manifesto(diretorio) if atualizado(caminho, diretorio) else construir(caminho, diretorio)
+    colunas = colunas_necessarias(perguntas) if colunas is None else list(colunas)
+    return pd.DataFrame({c: _coluna(diretorio, manifesto['colunas'][c], manifesto['linhas'])
+                         for c in manifesto['colunas'] if c in colunas}, copy=False)
@@ -0,0 +1,109 @@
+"""Distribuições de uma coluna numérica: histograma, densidade (KDE) e resumo, numa só passada.
+
+O KDE é binado: cada valor é repartido linearmente entre os dois pontos vizinhos de uma grade fixa
+(um par de bincounts, O(n)) e a grade é convoluída com o núcleo gaussiano por FFT
+(O(pontos log pontos)), em vez de somar um núcleo por linha em cada ponto como o KDE exato. Com a
+grade padrão a diferença para o KDE exato fica bem abaixo da espessura da linha no gráfico.
+
+A largura de banda segue a regra de Scott e a grade cobre o mesmo intervalo que o
+plot(kind='density') do pandas, então a curva é a mesma de antes. Os resultados ficam em memória,
+indexados pelo conteúdo da coluna: pedir de novo a mesma distribuição não recalcula nada.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+FAIXAS_HISTOGRAMA = 50
+PONTOS_KDE = 1024
+# O núcleo é truncado em ±DESVIOS_NUCLEO larguras de banda (massa desprezada < 1e-15)
+DESVIOS_NUCLEO = 8
+QUANTIS = (0.05, 0.25, 0.5, 0.75, 0.95)
+LIMITE_MEMORIA = 32
+
+_MEMORIA = OrderedDict()
+
+
+def banda_scott(valores):
+    """Largura de banda de Scott (a mesma do scipy.stats.gaussian_kde usado pelo pandas)."""
+    if len(valores) < 2:
+        return np.nan
+    return np.std(valores, ddof=1) * len(valores) ** (-1 / 5)
+
+
+def histograma(valores, faixas=FAIXAS_HISTOGRAMA, intervalo=None):
+    """(bordas, contagem) com faixas de mesma largura, como np.histogram."""
+    inicio, fim = intervalo or ((valores.min(), valores.max()) if len(valores) else (0.0, 1.0))
+    if fim <= inicio:
+        inicio, fim = inicio - 0.5, fim + 0.5
+    bordas = np.linspace(inicio, fim, faixas + 1)
+    dentro = valores[(valores >= inicio) & (valores <= fim)]
+    indices = np.minimum(((dentro - inicio) * (faixas / (fim - inicio))).astype(np.intp), faixas - 1)
+    return bordas, np.bincount(indices, minlength=faixas)
+
+
+def kde_binado(valores, pontos=PONTOS_KDE, banda=None, intervalo=None):
+    """(grade, densidade) do KDE gaussiano por binagem linear + convolução por FFT.
+
+    Sem `intervalo` a grade vai de mínimo - amplitude/2 a máximo + amplitude/2 (o padrão do pandas).
+    Devolve None quando a densidade não é definida (menos de duas linhas ou valores todos iguais).
+    """
+    banda = banda_scott(valores) if banda is None else banda
+    if not banda > 0:
+        return None
+    if intervalo is None:
+        minimo, maximo = valores.min(), valores.max()
+        intervalo = (minimo - (maximo - minimo) / 2, maximo + (maximo - minimo) / 2)
+    grade = np.linspace(*intervalo, pontos)
+    passo = grade[1] - grade[0]
+
+    # Binagem linear: cada valor divide o peso entre os dois pontos da grade que o cercam
+    posicao = (valores - grade[0]) / passo
+    dentro = (posicao >= 0) & (posicao <= pontos - 1)
+    posicao = posicao[dentro]
+    esquerda = np.minimum(posicao.astype(np.intp), pontos - 2)
+    fracao = posicao - esquerda
+    pesos = (np.bincount(esquerda, weights=1 - fracao, minlength=pontos)
+             + np.bincount(esquerda + 1, weights=fracao, minlength=pontos))
+
+    # Convolução com o núcleo amostrado na grade; o preenchimento com zeros evita a volta circular
+    alcance = min(int(np.ceil(DESVIOS_NUCLEO * banda / passo)), pontos - 1)
+    deslocamentos = np.arange(-alcance, alcance + 1) * passo
+    nucleo = np.exp(-0.5 * (deslocamentos / banda) ** 2) / (len(valores) * banda * np.sqrt(2 * np.pi))
+    tamanho = 1 << int(np.ceil(np.log2(pontos + 2 * alcance)))
+    convolucao = np.fft.irfft(np.fft.rfft(pesos, tamanho) * np.fft.rfft(nucleo, tamanho), tamanho)
+    # Erros de arredondamento da FFT podem dar densidades levemente negativas longe dos dados
+    return grade, np.maximum(convolucao[alcance:alcance + pontos], 0.0)
+
+
+def _chave(valores, parametros):
+    h = hashlib.blake2b(repr(parametros).encode(), digest_size=16)
+    h.update(np.ascontiguousarray(valores))
+    return h.digest()
+
+
+def distribuicao(valores, faixas=FAIXAS_HISTOGRAMA, pontos=PONTOS_KDE, quantis=QUANTIS):
+    """Histograma, KDE e resumo (n, média, mediana, quantis) dos valores presentes.
+
+    Resultado guardado em memória (LRU de LIMITE_MEMORIA entradas) pelo hash do conteúdo.
+    """
+    valores = np.asarray(valores, dtype='float64')
+    chave = _chave(valores, (faixas, pontos, tuple(quantis)))
+    if chave in _MEMORIA:
+        _MEMORIA.move_to_end(chave)
+        return _MEMORIA[chave]
+
+    valores = valores[~np.isnan(valores)]
+    resultado = {'n': len(valores), 'media': np.nan, 'mediana': np.nan,
+                 'quantis': dict.fromkeys(quantis, np.nan), 'histograma': None, 'kde': None}
+    if len(valores):
+        # Seleção parcial (introselect) para todos os quantis de uma vez, sem ordenar a coluna
+        posicoes = np.quantile(valores, [0.5, *quantis])
+        resultado.update({'media': valores.mean(), 'mediana': posicoes[0],
+                          'quantis': dict(zip(quantis, posicoes[1:])),
+                          'histograma': histograma(valores, faixas), 'kde': kde_binado(valores, pontos)})
+
+    _MEMORIA[chave] = resultado
+    while len(_MEMORIA) > LIMITE_MEMORIA:
+        _MEMORIA.popitem(last=False)
+    return resultado
@@ -0,0 +1,113 @@
+"""Elasticidade por segmento: mínimos quadrados fechados para todos os segmentos de uma vez.
+
+Para cada agrupamento (marca, material, temporada) as estatísticas suficientes da reta y = a + b·x
+(n, Σx, Σy, Σx², Σxy, Σy²) saem de np.bincount numa única passada; inclinação, intercepto e R² vêm
+delas por fórmula fechada, sem um ajuste por segmento. Os dados são centrados na média global antes
+das somas, o que evita o cancelamento numérico de Σx² - (Σx)²/n com milhões de linhas.
+
+Os intervalos de confiança vêm de um bootstrap de Poisson: cada reamostra dá a cada linha um peso
+Poisson(1) (equivalente assintótico da reamostragem com reposição, sem precisar sortear índices por
+segmento); cada reamostra é um punhado de bincounts vetorizados, e as reamostras são divididas entre
+processos.
+"""
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REAMOSTRAS_PADRAO = 200
+NIVEL_CONFIANCA = 0.95
+SEMENTE = 42
+MIN_PRODUTOS_SEGMENTO = 3
+# Abaixo deste volume (linhas x reamostras) o bootstrap roda no próprio processo
+_ELEMENTOS_PARALELO = 20_000_000
+
+
+def estatisticas_suficientes(codigos, x, y, num_segmentos, pesos=None):
+    """Matriz 6 x segmentos com n, Σx, Σy, Σx², Σxy, Σy² (ponderados por `pesos`, se houver)."""
+    pesos = np.ones(len(x)) if pesos is None else pesos
+    return np.stack([np.bincount(codigos, weights=pesos * termo, minlength=num_segmentos)
+                     for termo in (np.ones(len(x)), x, y, x * x, x * y, y * y)])
+
+
+def ajustar(estatisticas):
+    """Inclinação, intercepto e R² de cada coluna de estatísticas suficientes (NaN quando indefinidos)."""
+    n, sx, sy, sxx, sxy, syy = estatisticas
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_x, media_y = sx / n, sy / n
+        cxx, cxy, cyy = sxx - sx * media_x, sxy - sx * media_y, syy - sy * media_y
+        validos = (n >= MIN_PRODUTOS_SEGMENTO) & (cxx > 0)
+        inclinacao = np.where(validos, cxy / cxx, np.nan)
+        intercepto = media_y - inclinacao * media_x
+        r2 = np.where(validos & (cyy > 0), cxy * cxy / (cxx * cyy), np.nan)
+    return inclinacao, intercepto, r2
+
+
+def _reamostrar(codigos, x, y, num_segmentos, reamostras, semente):
+    """Inclinações de `reamostras` reamostras de Poisson: matriz reamostras x segmentos."""
+    rng = np.random.default_rng(semente)
+    # Termos por linha calculados uma vez; cada reamostra só muda os pesos (Σy² não entra na inclinação)
+    termos = (np.ones(len(x)), x, y, x * x, x * y)
+    inclinacoes = np.empty((reamostras, num_segmentos))
+    for b in range(reamostras):
+        pesos = rng.poisson(1.0, len(x))
+        somas = [np.bincount(codigos, weights=pesos * termo, minlength=num_segmentos) for termo in termos]
+        inclinacoes[b] = ajustar(somas + [np.zeros(num_segmentos)])[0]
+    return inclinacoes
+
+
+def bootstrap(codigos, x, y, num_segmentos, reamostras=REAMOSTRAS_PADRAO, workers=None, semente=SEMENTE):
+    """Inclinações bootstrap (reamostras x segmentos), com as reamostras divididas entre processos."""
+    workers = min(workers or os.cpu_count() or 1, reamostras)
+    if workers <= 1 or len(x) * reamostras < _ELEMENTOS_PARALELO:
+        return _reamostrar(codigos, x, y, num_segmentos, reamostras, semente)
+    sementes = np.random.SeedSequence(semente).spawn(workers)
+    partes = np.array_split(np.arange(reamostras), workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(_reamostrar, codigos, x, y, num_segmentos, len(parte), s)
+                   for parte, s in zip(partes, sementes)]
+        return np.concatenate([f.result() for f in futuros])
+
+
+def elasticidade_por_segmento(df, x, y, grupos, log=False, reamostras=0, workers=None,
+                              nivel=NIVEL_CONFIANCA, semente=SEMENTE):
+    """Tabela (Grupo, Segmento) -> Produtos, Inclinação, Intercepto, R² e IC da inclinação.
+
+    Com `log=True` a reta é ajustada em ln(x) x ln(y) (só linhas com x e y positivos) e a inclinação
+    é a elasticidade propriamente dita. Sem reamostras as colunas de IC ficam NaN.
+    """
+    valores_x = df[x].to_numpy(dtype='float64', na_value=np.nan)
+    valores_y = df[y].to_numpy(dtype='float64', na_value=np.nan)
+    validos = ~(np.isnan(valores_x) | np.isnan(valores_y))
+    if log:
+        validos &= (valores_x > 0) & (valores_y > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores_x, valores_y = np.log(valores_x), np.log(valores_y)
+    valores_x, valores_y = valores_x[validos], valores_y[validos]
+    centro_x, centro_y = (valores_x.mean(), valores_y.mean()) if len(valores_x) else (0.0, 0.0)
+    valores_x, valores_y = valores_x - centro_x, valores_y - centro_y
+
+    tabelas = {}
+    for numero, grupo in enumerate(grupos):
+        codigos, rotulos = pd.factorize(df[grupo].to_numpy()[validos], sort=True)
+        presentes = codigos >= 0
+        codigos, gx, gy = codigos[presentes], valores_x[presentes], valores_y[presentes]
+        estatisticas = estatisticas_suficientes(codigos, gx, gy, len(rotulos))
+        inclinacao, intercepto, r2 = ajustar(estatisticas)
+        tabela = pd.DataFrame({'Produtos': estatisticas[0].astype(np.int64), 'Inclinação': inclinacao,
+                               'Intercepto': intercepto + centro_y - inclinacao * centro_x, 'R2': r2,
+                               'IC_Inferior': np.nan, 'IC_Superior': np.nan},
+                              index=pd.Index(rotulos, name='Segmento'))
+        if reamostras:
+            amostras = bootstrap(codigos, gx, gy, len(rotulos), reamostras, workers, semente + numero)
+            with warnings.catch_warnings():
+                # Segmentos sem inclinação definida em nenhuma reamostra ficam com IC NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                inferior, superior = np.nanpercentile(amostras, [50 * (1 - nivel), 50 * (1 + nivel)], axis=0)
+            definida = ~np.isnan(inclinacao)
+            tabela['IC_Inferior'] = np.where(definida, inferior, np.nan)
+            tabela['IC_Superior'] = np.where(definida, superior, np.nan)
+        tabelas[grupo] = tabela
+    return pd.concat(tabelas, names=['Grupo', 'Segmento'])
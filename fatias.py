@@ -0,0 +1,235 @@
+"""Relatório completo por fatia (gênero, marca, temporada...) numa única execução.
+
+O dataset é carregado uma vez e ordenado pela chave de partição, de modo que cada fatia é um
+intervalo contíguo de linhas. As colunas numéricas e os códigos das categóricas vão para memória
+compartilhada (multiprocessing.shared_memory): os processos do pool montam a fatia como uma view
+desses blocos, sem copiar nem reinterpretar o CSV; só o texto (reviews, títulos) de cada fatia
+viaja com a tarefa. Cada fatia responde às perguntas da análise principal e grava relatório,
+exportações e gráficos no próprio diretório; ao final sai uma tabela consolidada com uma linha por
+fatia:
+
+    python fatias.py Marca --top 20
+    python fatias.py Gênero --perguntas 1,6,7 --sem-graficos --saida fatias_genero
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import analise_estrategica_ecommerce as analise
+from carregamento import ARQUIVO_LIMPO, TIPOS_COLUNAS, colunas_necessarias
+from classificacao_abc import COLUNA_LINHA
+from colunar import carregar_colunar
+from sentimento import COLUNAS_REVIEWS, pontuar_reviews
+
+CHAVES = [c for c, t in TIPOS_COLUNAS.items() if t == 'category']
+DIRETORIO_FATIAS = 'fatias'
+ARQUIVO_RESUMO = 'resumo_fatias.csv'
+ARQUIVO_RELATORIO = 'relatorio.txt'
+WORKERS_PADRAO = os.cpu_count() or 1
+
+# Colunas da fatia no processo que a monta: arrays ordenados pela chave (views da memória compartilhada
+# nos workers do pool) e as categorias de cada coluna categórica
+_COLUNAS = {}
+_CATEGORIAS = {}
+_MEMORIAS = []
+
+
+def _nome_diretorio(rotulo):
+    return re.sub(r'[^\w-]+', '_', str(rotulo)).strip('_') or 'vazio'
+
+
+def particionar(df, chave, top=None):
+    """Ordena as linhas pela chave; devolve (df ordenado, [(rótulo, início, fim)]) das fatias não vazias.
+
+    A posição de cada linha antes da ordenação fica em COLUNA_LINHA (exportada com as classes ABC).
+    Com `top` ficam só as `top` fatias de maior receita.
+    """
+    codigos = df[chave].cat.codes.to_numpy()
+    ordem = np.argsort(codigos, kind='stable')
+    contagem = np.bincount(codigos[codigos >= 0], minlength=len(df[chave].cat.categories))
+    # Linhas sem chave (código -1) ficam antes da primeira fatia
+    fim = np.cumsum(contagem) + int((codigos < 0).sum())
+    fatias = [(rotulo, int(f - n), int(f)) for rotulo, n, f in zip(df[chave].cat.categories, contagem, fim) if n]
+    if top:
+        receita = dict(zip(df[chave].cat.categories,
+                           np.bincount(codigos[codigos >= 0], minlength=len(contagem),
+                                       weights=np.nan_to_num(df['Receita_Estimada'].to_numpy()[codigos >= 0]))))
+        fatias = sorted(fatias, key=lambda fatia: receita[fatia[0]], reverse=True)[:top]
+    ordenado = df.iloc[ordem].reset_index(drop=True)
+    ordenado[COLUNA_LINHA] = ordem
+    return ordenado, fatias
+
+
+def _arrays(df):
+    """Colunas numéricas e códigos categóricos como arrays; o texto fica de fora (vai com cada tarefa)."""
+    arrays, categorias = {}, {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            arrays[coluna], categorias[coluna] = serie.cat.codes.to_numpy(), serie.cat.categories
+        elif pd.api.types.is_numeric_dtype(serie):
+            arrays[coluna] = serie.to_numpy()
+    return arrays, categorias
+
+
+def _compartilhar(arrays):
+    """Copia cada array para um bloco de memória compartilhada; devolve (blocos, descrição para os workers)."""
+    memorias, descricao = [], {}
+    for coluna, array in arrays.items():
+        memoria = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        memorias.append(memoria)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=memoria.buf)[:] = array
+        descricao[coluna] = (memoria.name, array.dtype.str, len(array))
+    return memorias, descricao
+
+
+def _configurar(categorias, descricao=None, arrays=None):
+    # Inicialização de cada worker (ou do próprio processo, no modo sequencial)
+    _CATEGORIAS.update(categorias)
+    if arrays is not None:
+        _COLUNAS.update(arrays)
+    for coluna, (nome, tipo, linhas) in (descricao or {}).items():
+        memoria = shared_memory.SharedMemory(name=nome)
+        _MEMORIAS.append(memoria)
+        _COLUNAS[coluna] = np.ndarray(linhas, dtype=tipo, buffer=memoria.buf)
+    # O paralelismo fica entre as fatias: nada de pools aninhados dentro de cada uma
+    analise.WORKERS_SEGMENTOS = analise.WORKERS_ELASTICIDADE = 1
+
+
+def _montar_fatia(inicio, fim, textos):
+    dados = {}
+    for coluna, array in _COLUNAS.items():
+        if coluna in _CATEGORIAS:
+            dados[coluna] = pd.Categorical.from_codes(array[inicio:fim], categories=_CATEGORIAS[coluna],
+                                                      validate=False)
+        else:
+            dados[coluna] = array[inicio:fim]
+    dados.update({coluna: pd.array(valores, dtype='str') for coluna, valores in textos.items()})
+    return pd.DataFrame(dados, copy=False)
+
+
+def _resumo(rotulo, analise_fatia, produtos):
+    globais, perguntas = analise_fatia['globais'], analise_fatia['perguntas']
+    linha = {'Fatia': rotulo, 'Produtos': produtos}
+    if 'Receita_Estimada' in globais:
+        linha['Receita_Total'] = globais['Receita_Estimada']['soma']
+    if 'Preço' in globais:
+        linha['Preco_Medio'] = globais['Preço']['media']
+    if 'Nota' in globais:
+        linha.update({'Nota_Media': globais['Nota']['media'], 'Taxa_Satisfacao': globais['taxa_satisfacao']})
+    marcas = analise_fatia['tabelas'].get('Marca')
+    if marcas is not None and 'Receita_Estimada' in marcas and len(marcas):
+        linha['Marca_Lider'] = marcas['Receita_Estimada'].idxmax()
+    if 'classes_abc' in perguntas.get(6, {}):
+        linha['Produtos_Classe_A'] = int(perguntas[6]['classes_abc']['A'])
+    if 'max_receita_faixa' in perguntas.get(7, {}):
+        linha['Faixa_Preco_Ideal'] = str(perguntas[7]['max_receita_faixa'])
+    if 'percentual_positivo' in perguntas.get(5, {}):
+        linha['Sentimento_Positivo_%'] = perguntas[5]['percentual_positivo']
+    return linha
+
+
+def analisar_fatia(tarefa):
+    """Roda as perguntas numa fatia dentro do diretório dela; devolve a linha do resumo consolidado."""
+    rotulo, inicio, fim = tarefa['rotulo'], tarefa['inicio'], tarefa['fim']
+    comeco = time.perf_counter()
+    diretorio_original = os.getcwd()
+    os.makedirs(tarefa['diretorio'], exist_ok=True)
+    os.chdir(tarefa['diretorio'])
+    try:
+        analise_fatia = analise.analisar_df(_montar_fatia(inicio, fim, tarefa['textos']),
+                                            perguntas=tarefa['perguntas'])
+        with open(ARQUIVO_RELATORIO, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(f"{tarefa['chave']}: {rotulo} ({fim - inicio} produtos)\n")
+            for numero, resultado in analise_fatia['perguntas'].items():
+                arquivo.write(f"\n{analise.PERGUNTAS[numero][0]}\n")
+                for linha in resultado['insights'] or ["(dados insuficientes nesta fatia)"]:
+                    arquivo.write(f"  {linha}\n")
+        linha = _resumo(rotulo, analise_fatia, fim - inicio)
+        if tarefa['graficos']:
+            import graficos
+            specs = [spec for resultado in analise_fatia['perguntas'].values() for spec in resultado['graficos']]
+            linha['Graficos'] = sum(erro is None for _, erro in graficos.renderizar_graficos(specs, 1))
+    except Exception as erro:
+        linha = {'Fatia': rotulo, 'Produtos': fim - inicio, 'Erro': f'{type(erro).__name__}: {erro}'}
+    finally:
+        os.chdir(diretorio_original)
+    linha['Segundos'] = time.perf_counter() - comeco
+    return linha
+
+
+def relatorio_por_fatias(chave, caminho=ARQUIVO_LIMPO, perguntas=None, top=None, saida=DIRETORIO_FATIAS,
+                         workers=None, graficos=True):
+    """Gera o relatório de cada fatia de `chave` em saida/<fatia>/ e o resumo consolidado em saida/."""
+    perguntas = perguntas or list(analise.PERGUNTAS)
+    workers = workers or WORKERS_PADRAO
+    colunas = list(dict.fromkeys(colunas_necessarias(perguntas) + [chave, 'Receita_Estimada']))
+    df = carregar_colunar(caminho, colunas=colunas)
+    # Sentimento pontuado uma vez no dataset inteiro; nas fatias as contagens já chegam como colunas
+    if any(coluna in df.columns for coluna in COLUNAS_REVIEWS):
+        df = df.join(pontuar_reviews(df))
+    df, fatias = particionar(df, chave, top)
+    arrays, categorias = _arrays(df)
+    textos = {c: df[c].to_numpy(dtype=object, na_value=None) for c in df.columns if c not in arrays}
+
+    saida = os.path.abspath(saida)
+    tarefas = [{'chave': chave, 'rotulo': rotulo, 'inicio': inicio, 'fim': fim, 'perguntas': perguntas,
+                'graficos': graficos, 'diretorio': os.path.join(saida, _nome_diretorio(rotulo)),
+                'textos': {c: valores[inicio:fim] for c, valores in textos.items()}}
+               for rotulo, inicio, fim in fatias]
+
+    if workers <= 1 or len(tarefas) <= 1:
+        _configurar(categorias, arrays=arrays)
+        linhas = [analisar_fatia(tarefa) for tarefa in tarefas]
+    else:
+        memorias, descricao = _compartilhar(arrays)
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tarefas)), initializer=_configurar,
+                                     initargs=(categorias, descricao)) as executor:
+                linhas = list(executor.map(analisar_fatia, tarefas))
+        finally:
+            for memoria in memorias:
+                memoria.close()
+                memoria.unlink()
+
+    resumo = pd.DataFrame(linhas).set_index('Fatia')
+    resumo.index.name = chave
+    if 'Receita_Total' in resumo:
+        resumo.insert(2, 'Participacao_Receita', resumo['Receita_Total'] / df['Receita_Estimada'].sum() * 100)
+        resumo = resumo.sort_values('Receita_Total', ascending=False)
+    os.makedirs(saida, exist_ok=True)
+    resumo.to_csv(os.path.join(saida, ARQUIVO_RESUMO))
+    return resumo
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('chave', choices=CHAVES, help='coluna que define as fatias')
+    parser.add_argument('--top', type=int, help='só as N fatias de maior receita')
+    parser.add_argument('--perguntas', '--questions', type=analise._lista_perguntas, default=None, metavar='1,6,8',
+                        help='perguntas respondidas em cada fatia (padrão: todas)')
+    parser.add_argument('--sem-graficos', '--no-plots', action='store_true', help='só relatórios e resumo')
+    parser.add_argument('--dados', default=ARQUIVO_LIMPO, help='CSV limpo analisado (padrão: %(default)s)')
+    parser.add_argument('--saida', default=None, help=f'diretório de saída (padrão: {DIRETORIO_FATIAS}/<chave>)')
+    parser.add_argument('--workers', type=int, default=None, help='processos (padrão: um por CPU)')
+    args = parser.parse_args(argumentos)
+
+    saida = args.saida or os.path.join(DIRETORIO_FATIAS, _nome_diretorio(args.chave))
+    comeco = time.perf_counter()
+    resumo = relatorio_por_fatias(args.chave, args.dados, args.perguntas, args.top, saida, args.workers,
+                                  not args.sem_graficos)
+    with pd.option_context('display.max_columns', None, 'display.width', 160):
+        print(resumo.drop(columns='Segundos'))
+    falhas = int(resumo['Erro'].notna().sum()) if 'Erro' in resumo else 0
+    print(f"\n✓ {len(resumo)} fatias de {args.chave} em {time.perf_counter() - comeco:.1f}s"
+          f"{f' ({falhas} com erro)' if falhas else ''}; resumo em {os.path.join(saida, ARQUIVO_RESUMO)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""Renderização dos gráficos a partir de especificações (specs) montadas pelas perguntas.
+
+Cada spec é um dicionário pequeno com o nome do gráfico, o arquivo de saída e os dados já agregados,
+de modo que os gráficos podem ser desenhados em paralelo num pool de processos (backend Agg).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+
+DPI = 300
+WORKERS_PADRAO = os.cpu_count() or 1
+
+
+def configurar_estilo():
+    # Configurações visuais (aplicadas no processo principal e em cada worker)
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    plt.rcParams['font.size'] = 11
+
+
+# ============================================================================
+# GRÁFICOS POR PERGUNTA
+# ============================================================================
+
+def _marca_receita(spec, plt):
+    receita = spec['receita']
+    fig, ax = plt.subplots(figsize=(12, 7))
+    receita.plot(kind='barh', color='coral', edgecolor='black', ax=ax)
+    ax.set_title('Top 10 Marcas por Receita Estimada', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Receita Estimada (R$)', fontsize=12)
+    ax.set_ylabel('Marca', fontsize=12)
+    ax.grid(axis='x', alpha=0.3)
+    for i, v in enumerate(receita.values):
+        ax.text(v, i, f' R${v:,.0f}', va='center', fontweight='bold', fontsize=10)
+
+
+def _marca_qualidade(spec, plt):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    spec['nota'].plot(kind='barh', color='steelblue', edgecolor='black', ax=ax)
+    ax.set_title('Qualidade por Marca (Nota Média)', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Nota Média (0-5)', fontsize=12)
+    ax.set_ylabel('Marca', fontsize=12)
+    ax.axvline(spec['media_geral'], color='red', linestyle='--', linewidth=2,
+               label=f'Média Geral: {spec["media_geral"]:.2f}')
+    ax.legend()
+    ax.grid(axis='x', alpha=0.3)
+
+
+def _material_custo_beneficio(spec, plt):
+    material_analysis = spec['materiais']
+    fig, ax = plt.subplots(figsize=(12, 8))
+    scatter = ax.scatter(material_analysis['Preço'], material_analysis['Nota'],
+                         s=material_analysis['Qtd_Vendidos_Numeric'] / 100,
+                         c=material_analysis['Qtd_Vendidos_Numeric'],
+                         cmap='viridis', alpha=0.6, edgecolors='black', linewidth=2)
+
+    for idx, row in material_analysis.iterrows():
+        ax.annotate(idx, (row['Preço'], row['Nota']), fontsize=9, ha='center')
+
+    ax.set_title('Material: Preço x Qualidade x Volume de Vendas', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Preço Médio (R$)', fontsize=12)
+    ax.set_ylabel('Nota Média', fontsize=12)
+    ax.grid(alpha=0.3)
+    cbar = plt.colorbar(scatter, ax=ax)
+    cbar.set_label('Volume de Vendas', rotation=270, labelpad=20)
+
+
+def _material_variacao_preco(spec, plt):
+    fig, ax = plt.subplots(figsize=(14, 7))
+    spec['precos'].boxplot(column='Preço', by='Material', ax=ax, patch_artist=True)
+    ax.set_title('Variação de Preços por Material (Top 8)', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Material', fontsize=12)
+    ax.set_ylabel('Preço (R$)', fontsize=12)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+    plt.suptitle('')
+
+
+def _temporada_receita(spec, plt):
+    receita = spec['receita']
+    fig, ax = plt.subplots(figsize=(12, 7))
+    receita.plot(kind='bar', color='teal', edgecolor='black', ax=ax)
+    ax.set_title('Receita por Temporada', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Temporada', fontsize=12)
+    ax.set_ylabel('Receita Estimada (R$)', fontsize=12)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.grid(axis='y', alpha=0.3)
+    for i, v in enumerate(receita.values):
+        ax.text(i, v, f'R${v:,.0f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
+
+
+def _temporada_preco(spec, plt):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    spec['preco'].plot(kind='bar', color='coral', edgecolor='black', ax=ax)
+    ax.set_title('Preço Médio por Temporada', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Temporada', fontsize=12)
+    ax.set_ylabel('Preço Médio (R$)', fontsize=12)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.grid(axis='y', alpha=0.3)
+
+
+def _desconto_elasticidade(spec, plt):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    ax.scatter(spec['desconto'], spec['vendas'], alpha=0.5, s=50, color='navy')
+    ax.plot(spec['reta_x'], spec['reta_y'], color='red', linewidth=3, label=f'R²={spec["r2"]:.3f}')
+    ax.set_title('Elasticidade: Desconto x Volume de Vendas', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Desconto (%)', fontsize=12)
+    ax.set_ylabel('Quantidade Vendida', fontsize=12)
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3)
+
+
+def _faixa_desconto_receita(spec, plt):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    spec['receita'].plot(kind='bar', color='purple', edgecolor='black', ax=ax)
+    ax.set_title('Receita por Faixa de Desconto', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Faixa de Desconto', fontsize=12)
+    ax.set_ylabel('Receita Total (R$)', fontsize=12)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
+    ax.grid(axis='y', alpha=0.3)
+
+
+def _sentimento(spec, plt):
+    sentimentos = spec['sentimentos']
+    fig, ax = plt.subplots(figsize=(10, 7))
+    sentimentos.plot(kind='bar', color=['green', 'red'], edgecolor='black', ax=ax)
+    ax.set_title('Análise de Sentimento - Reviews dos Clientes', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Sentimento', fontsize=12)
+    ax.set_ylabel('Frequência de Palavras', fontsize=12)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
+    ax.grid(axis='y', alpha=0.3)
+    for i, v in enumerate(sentimentos.values):
+        ax.text(i, v, f'{v}', ha='center', va='bottom', fontweight='bold', fontsize=12)
+
+
+def _wordcloud(spec, plt):
+    try:
+        from wordcloud import WordCloud
+    except ImportError:
+        raise ImportError('instale: pip install wordcloud')
+    fig, ax = plt.subplots(figsize=(14, 8))
+    wordcloud = WordCloud(width=1200, height=600, background_color='white',
+                          colormap='viridis', max_words=100).generate_from_frequencies(spec['frequencias'])
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title('Palavras Mais Frequentes nos Reviews', fontweight='bold', fontsize=16, pad=20)
+
+
+def _curva_abc(spec, plt):
+    fig, ax = plt.subplots(figsize=(14, 7))
+    ax_2 = ax.twinx()
+
+    # Barras: receita média por produto em cada quantil; linha: percentual acumulado
+    posicoes = spec['posicoes']
+    ax.bar(posicoes[:-1], spec['receita_media'], width=np.diff(posicoes), align='edge',
+           color='steelblue', alpha=0.6, label='Receita média por produto')
+    ax_2.plot(posicoes, spec['percentual'], color='red',
+              linewidth=3, marker='o', markersize=2, label='% Acumulado')
+    ax_2.axhline(80, color='green', linestyle='--', linewidth=2, label='80% (Pareto)')
+
+    ax.set_title('Curva ABC - Princípio de Pareto (80/20)', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Produtos (ordenados por receita)', fontsize=12)
+    ax.set_ylabel('Receita Estimada (R$)', fontsize=12)
+    ax_2.set_ylabel('Percentual Acumulado (%)', fontsize=12)
+    ax.legend(loc='upper left')
+    ax_2.legend(loc='upper right')
+    ax.grid(alpha=0.3)
+
+
+def _sweet_spot(spec, plt):
+    preco_vendas = spec['faixas']
+    fig, ax = plt.subplots(figsize=(14, 7))
+    ax_2 = ax.twinx()
+
+    x_pos = range(len(preco_vendas))
+    ax.bar(x_pos, preco_vendas['Qtd_Vendidos_Numeric'], color='skyblue',
+           alpha=0.7, label='Volume de Vendas')
+    ax_2.plot(x_pos, preco_vendas['Receita_Estimada'], color='darkred',
+              linewidth=3, marker='o', markersize=8, label='Receita')
+
+    ax.set_title('Sweet Spot de Preço: Volume x Receita', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Faixa de Preço', fontsize=12)
+    ax.set_ylabel('Volume de Vendas', fontsize=12, color='skyblue')
+    ax_2.set_ylabel('Receita Estimada (R$)', fontsize=12, color='darkred')
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels([f'{int(interval.left)}-{int(interval.right)}'
+                        for interval in preco_vendas.index], rotation=45, ha='right')
+    ax.legend(loc='upper left')
+    ax_2.legend(loc='upper right')
+    ax.grid(alpha=0.3)
+
+
+def _segmentos(spec, plt):
+    resumo = spec['resumo']
+    fig, ax = plt.subplots(figsize=(12, 7))
+    ax_2 = ax.twinx()
+
+    x_pos = range(len(resumo))
+    ax.bar(x_pos, resumo['Participacao_Receita'], color='seagreen', edgecolor='black',
+           alpha=0.8, label='% da Receita')
+    ax_2.plot(x_pos, resumo['Nota_Media'], color='darkorange', linewidth=3, marker='o',
+              markersize=8, label='Nota Média')
+
+    ax.set_title('Segmentos de Produtos: Receita x Qualidade', fontweight='bold', fontsize=14, pad=15)
+    ax.set_xlabel('Segmento (produtos)', fontsize=12)
+    ax.set_ylabel('Participação na Receita (%)', fontsize=12, color='seagreen')
+    ax_2.set_ylabel('Nota Média', fontsize=12, color='darkorange')
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels([f'{cluster} ({produtos})' for cluster, produtos in resumo['Produtos'].items()])
+    ax.legend(loc='upper left')
+    ax_2.legend(loc='upper right')
+    ax.grid(alpha=0.3)
+
+
+def _correlacao(spec, plt):
+    import seaborn as sns
+    fig, ax = plt.subplots(figsize=(12, 10))
+    sns.heatmap(spec['matriz'], annot=True, fmt='.2f', cmap='coolwarm',
+                center=0, square=True, linewidths=2, cbar_kws={"shrink": 0.8}, ax=ax,
+                annot_kws={"fontsize": 11})
+    ax.set_title('Mapa de Correlação - Variáveis Críticas de Negócio', fontweight='bold', fontsize=14, pad=15)
+
+
+def _distribuicao(spec, plt):
+    fig, (ax_a, ax_b) = plt.subplots(1, 2, figsize=(16, 6))
+
+    # Histograma (faixas já contadas pelo motor de distribuições)
+    bordas, contagem = spec['histograma_preco']
+    ax_a.bar(bordas[:-1], contagem, width=np.diff(bordas), align='edge',
+             edgecolor='black', alpha=0.7, color='steelblue')
+    ax_a.axvline(spec['media_preco'], color='red', linestyle='--', linewidth=2,
+                 label=f'Média: R${spec["media_preco"]:.2f}')
+    ax_a.axvline(spec['mediana_preco'], color='green', linestyle='--', linewidth=2,
+                 label=f'Mediana: R${spec["mediana_preco"]:.2f}')
+    ax_a.set_title('Histograma de Preços', fontweight='bold', fontsize=13)
+    ax_a.set_xlabel('Preço (R$)')
+    ax_a.set_ylabel('Frequência')
+    ax_a.legend()
+    ax_a.grid(alpha=0.3)
+
+    # Densidade de Notas (KDE binado, calculado uma única vez)
+    if spec['densidade_nota'] is not None:
+        x, y = spec['densidade_nota']
+        ax_b.plot(x, y, color='darkgreen', linewidth=3)
+        ax_b.fill_between(x, y, alpha=0.3, color='lightgreen')
+    ax_b.axvline(spec['media_nota'], color='red', linestyle='--', linewidth=2,
+                 label=f'Média: {spec["media_nota"]:.2f}')
+    ax_b.set_title('Densidade de Notas', fontweight='bold', fontsize=13)
+    ax_b.set_xlabel('Nota (0-5)')
+    ax_b.set_ylabel('Densidade')
+    ax_b.legend()
+    ax_b.grid(alpha=0.3)
+
+
+RENDERIZADORES = {
+    'marca_receita': _marca_receita,
+    'marca_qualidade': _marca_qualidade,
+    'material_custo_beneficio': _material_custo_beneficio,
+    'material_variacao_preco': _material_variacao_preco,
+    'temporada_receita': _temporada_receita,
+    'temporada_preco': _temporada_preco,
+    'desconto_elasticidade': _desconto_elasticidade,
+    'faixa_desconto_receita': _faixa_desconto_receita,
+    'sentimento': _sentimento,
+    'wordcloud': _wordcloud,
+    'curva_abc': _curva_abc,
+    'sweet_spot': _sweet_spot,
+    'segmentos': _segmentos,
+    'correlacao': _correlacao,
+    'distribuicao': _distribuicao,
+}
+
+
+# ============================================================================
+# EXECUÇÃO (SEQUENCIAL OU EM POOL DE PROCESSOS)
+# ============================================================================
+
+def renderizar(spec):
+    """Desenha e salva um gráfico a partir da spec; devolve o nome do arquivo gerado.
+
+    O PNG é gravado num temporário do processo e renomeado: quem vê o arquivo o vê completo, mesmo
+    com dois processos desenhando o mesmo gráfico ao mesmo tempo.
+    """
+    import matplotlib.pyplot as plt
+    raiz, extensao = os.path.splitext(spec['arquivo'])
+    temporario = f'{raiz}.{os.getpid()}.tmp{extensao}'
+    try:
+        RENDERIZADORES[spec['grafico']](spec, plt)
+        plt.tight_layout()
+        plt.savefig(temporario, dpi=DPI, bbox_inches='tight')
+        os.replace(temporario, spec['arquivo'])
+    finally:
+        plt.close('all')
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return spec['arquivo']
+
+
+def renderizar_graficos(specs, workers=WORKERS_PADRAO):
+    """Renderiza as specs em paralelo e devolve [(arquivo, erro ou None)] na ordem recebida.
+
+    Com workers <= 1 (ou um único gráfico) tudo roda no próprio processo, sem custo de pool; sem
+    nenhum gráfico (todos restaurados do cache) nem o estilo é configurado, então pyplot/seaborn não
+    são importados.
+    """
+    if not specs:
+        return []
+    if workers <= 1 or len(specs) <= 1:
+        configurar_estilo()
+        resultados = []
+        for spec in specs:
+            try:
+                resultados.append((renderizar(spec), None))
+            except Exception as erro:
+                resultados.append((spec['arquivo'], erro))
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(specs)), initializer=configurar_estilo) as pool:
+        futuros = [pool.submit(renderizar, spec) for spec in specs]
+        resultados = []
+        for spec, futuro in zip(specs, futuros):
+            try:
+                resultados.append((futuro.result(), None))
+            except Exception as erro:
+                resultados.append((spec['arquivo'], erro))
+        return resultados
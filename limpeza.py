@@ -0,0 +1,129 @@
+"""Limpeza do export bruto (ecommerce_estatistica.csv) para a tabela da análise (ecommerce_limpo.csv).
+
+Etapas, todas vetorizadas e aplicadas bloco a bloco:
+- remove o índice solto (`Unnamed: 0`) e linhas duplicadas;
+- texto em minúsculas, com quebras de linha e espaços repetidos reduzidos a um espaço;
+- Nota, N_Avaliações, Desconto e Preço limitados aos percentis 1% e 99% (winsorização);
+- Qtd_Vendidos ('+50', '+10mil') vira Qtd_Vendidos_Numeric;
+- Preço_Final, Receita_Estimada, Faixa_Preço e Classificação_Nota são derivados.
+
+São duas passadas sobre o CSV bruto: a primeira marca as duplicatas (por hash da linha) e guarda só
+as quatro colunas winsorizadas, para os percentis; a segunda grava o resultado bloco a bloco.
+
+    python limpeza.py [origem] [destino]
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from carregamento import ARQUIVO_LIMPO, TAMANHO_BLOCO_PADRAO
+
+ARQUIVO_BRUTO = 'ecommerce_estatistica.csv'
+COLUNA_INDICE = 'Unnamed: 0'
+# Texto fixado como str: inferido por bloco, um bloco só com '+100' viraria inteiro
+COLUNAS_TEXTO = ['Título', 'Marca', 'Material', 'Gênero', 'Temporada', 'Review1', 'Review2', 'Review3',
+                 'Qtd_Vendidos']
+COLUNAS_WINSORIZADAS = ['Nota', 'N_Avaliações', 'Desconto', 'Preço']
+PERCENTIS_WINSORIZACAO = (0.01, 0.99)
+
+FAIXAS_PRECO_BINS = [0, 50, 100, 200, 500, np.inf]
+FAIXAS_PRECO_LABELS = ['Até R$50', 'R$50-100', 'R$100-200', 'R$200-500', 'Acima de R$500']
+CLASSIFICACAO_NOTA_BINS = [0, 3.5, 4.0, 4.5, 5.0]
+CLASSIFICACAO_NOTA_LABELS = ['Baixa', 'Média', 'Boa', 'Excelente']
+
+PADRAO_QUANTIDADE = r'(?P<numero>\d+(?:[.,]\d+)?)\s*(?P<mil>mil)?'
+
+
+def normalizar_texto(serie):
+    return serie.str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def quantidade_vendida(serie):
+    """'+50' -> 50, '+10mil' -> 10000 (NaN quando não há número)."""
+    partes = serie.str.lower().str.extract(PADRAO_QUANTIDADE)
+    numero = pd.to_numeric(partes['numero'].str.replace(',', '.', regex=False), errors='coerce')
+    return numero.astype('float64') * np.where(partes['mil'].notna(), 1000, 1)
+
+
+def faixa_preco(preco):
+    return pd.cut(preco, bins=FAIXAS_PRECO_BINS, labels=FAIXAS_PRECO_LABELS)
+
+
+def classificacao_nota(nota):
+    return pd.cut(nota, bins=CLASSIFICACAO_NOTA_BINS, labels=CLASSIFICACAO_NOTA_LABELS, include_lowest=True)
+
+
+def _ler_bruto(caminho, tamanho_bloco):
+    return pd.read_csv(caminho, chunksize=tamanho_bloco, dtype={c: 'str' for c in COLUNAS_TEXTO})
+
+
+def _hash_linhas(bloco):
+    # Numéricas como float64: um bloco com NaN numa coluna inteira não muda o hash das demais linhas
+    numericas = bloco.select_dtypes('number').columns
+    return pd.util.hash_pandas_object(bloco.astype({c: 'float64' for c in numericas}), index=False).to_numpy()
+
+
+def _marcar_duplicatas(caminho, tamanho_bloco):
+    """Primeira passada: máscara das linhas mantidas (primeira ocorrência) e valores para os percentis."""
+    vistos = np.empty(0, dtype=np.uint64)
+    mantidas, valores = [], []
+    with _ler_bruto(caminho, tamanho_bloco) as leitor:
+        for bloco in leitor:
+            bloco = bloco.drop(columns=COLUNA_INDICE, errors='ignore')
+            hashes = _hash_linhas(bloco)
+            posicoes = np.searchsorted(vistos, hashes).clip(max=max(len(vistos) - 1, 0))
+            nova = ~pd.Series(hashes).duplicated().to_numpy()
+            if len(vistos):
+                nova &= vistos[posicoes] != hashes
+            # Concatenar duas sequências ordenadas e reordenar com timsort é uma intercalação linear
+            vistos = np.sort(np.concatenate([vistos, np.sort(hashes[nova])]), kind='stable')
+            mantidas.append(nova)
+            valores.append(bloco.loc[nova, COLUNAS_WINSORIZADAS].to_numpy(dtype='float64'))
+    return mantidas, np.concatenate(valores) if valores else np.empty((0, len(COLUNAS_WINSORIZADAS)))
+
+
+def limpar_bloco(bloco, limites):
+    """Aplica normalização de texto, winsorização e colunas derivadas a um bloco sem duplicatas."""
+    bloco = bloco.drop(columns=COLUNA_INDICE, errors='ignore').copy()
+    for coluna in bloco.columns.intersection(COLUNAS_TEXTO):
+        bloco[coluna] = normalizar_texto(bloco[coluna])
+    for coluna, (minimo, maximo) in limites.items():
+        bloco[coluna] = bloco[coluna].clip(minimo, maximo)
+
+    bloco['Qtd_Vendidos_Numeric'] = quantidade_vendida(bloco['Qtd_Vendidos'])
+    bloco['Preço_Final'] = bloco['Preço'] * (1 - bloco['Desconto'] / 100)
+    bloco['Receita_Estimada'] = bloco['Preço_Final'] * bloco['Qtd_Vendidos_Numeric']
+    bloco['Faixa_Preço'] = faixa_preco(bloco['Preço'])
+    bloco['Classificação_Nota'] = classificacao_nota(bloco['Nota'])
+    return bloco
+
+
+def limpar_dataset(origem=ARQUIVO_BRUTO, destino=ARQUIVO_LIMPO, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Gera `destino` a partir do export bruto `origem`; devolve o número de linhas gravadas."""
+    mantidas, valores = _marcar_duplicatas(origem, tamanho_bloco)
+    percentis = np.nanquantile(valores, PERCENTIS_WINSORIZACAO, axis=0) if len(valores) else None
+    limites = ({coluna: tuple(percentis[:, i]) for i, coluna in enumerate(COLUNAS_WINSORIZADAS)}
+               if percentis is not None else {})
+
+    linhas = 0
+    temporario = destino + '.tmp'
+    with open(temporario, 'w', encoding='utf-8', newline='') as arquivo, _ler_bruto(origem, tamanho_bloco) as leitor:
+        for numero, (bloco, mascara) in enumerate(zip(leitor, mantidas)):
+            limpo = limpar_bloco(bloco[mascara], limites)
+            limpo.to_csv(arquivo, header=numero == 0, index=False, lineterminator='\r\n')
+            linhas += len(limpo)
+    os.replace(temporario, destino)
+    return linhas
+
+
+def desatualizado(origem=ARQUIVO_BRUTO, destino=ARQUIVO_LIMPO):
+    """True quando o dataset limpo não existe ou é mais antigo que o export bruto."""
+    return not os.path.exists(destino) or os.path.getmtime(destino) < os.path.getmtime(origem)
+
+
+if __name__ == '__main__':
+    origem = sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_BRUTO
+    destino = sys.argv[2] if len(sys.argv) > 2 else ARQUIVO_LIMPO
+    print(f"✓ {limpar_dataset(origem, destino)} linhas limpas gravadas em {destino}")
@@ -0,0 +1,139 @@
+"""Segmentação de produtos por clusterização mini-batch sobre as features normalizadas.
+
+Os dados chegam como uma fábrica de blocos (função sem argumentos que devolve um iterador de
+DataFrames), percorrida em três passadas de memória limitada:
+1. amostra aleatória de tamanho fixo (as linhas com as menores chaves aleatórias, mesclável entre
+   blocos), sobre a qual uma varredura de k roda em paralelo, um processo por k, escolhendo o k de
+   maior silhueta;
+2. MiniBatchKMeans com o k escolhido, iniciado nos centros da varredura e refinado com partial_fit
+   bloco a bloco;
+3. rótulo de cada produto, gravado bloco a bloco no arquivo de produtos, e resumo por cluster
+   acumulado com bincount.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ['Nota_MinMax', 'Preço_MinMax', 'Desconto_MinMax', 'N_Avaliações_MinMax', 'Marca_Freq']
+COLUNAS_RESUMO = ['Receita_Estimada', 'Nota', 'Preço']
+COLUNAS_IDENTIFICACAO = ['Título', 'Marca']
+KS_PADRAO = range(2, 9)
+TAMANHO_AMOSTRA = 50_000
+AMOSTRA_SILHUETA = 5_000
+TAMANHO_LOTE = 4096
+SEMENTE = 42
+ARQUIVO_SEGMENTOS = 'segmentos_produtos.csv'
+
+
+def blocos_de(df, tamanho=100_000):
+    """Fábrica de blocos sobre um DataFrame já em memória."""
+    return lambda: (df.iloc[inicio:inicio + tamanho] for inicio in range(0, len(df), tamanho))
+
+
+def _features(bloco):
+    x = bloco[FEATURES].to_numpy(dtype='float64', na_value=np.nan)
+    return x, ~np.isnan(x).any(axis=1)
+
+
+def amostrar(blocos, tamanho=TAMANHO_AMOSTRA, semente=SEMENTE):
+    """Amostra uniforme sem reposição de até `tamanho` linhas completas, numa passada."""
+    rng = np.random.default_rng(semente)
+    amostra, chaves = np.empty((0, len(FEATURES))), np.empty(0)
+    for bloco in blocos():
+        x, completas = _features(bloco)
+        amostra = np.concatenate([amostra, x[completas]])
+        chaves = np.concatenate([chaves, rng.random(int(completas.sum()))])
+        if len(chaves) > tamanho:
+            mantidas = np.argpartition(chaves, tamanho - 1)[:tamanho]
+            amostra, chaves = amostra[mantidas], chaves[mantidas]
+    return amostra
+
+
+def _avaliar_k(amostra, k, semente):
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    modelo = MiniBatchKMeans(n_clusters=k, batch_size=TAMANHO_LOTE, n_init=3, random_state=semente).fit(amostra)
+    if len(np.unique(modelo.labels_)) < 2:
+        # Todos os pontos num só cluster (amostra com poucos pontos distintos): silhueta mínima
+        return {'k': k, 'silhueta': -1.0, 'inercia': modelo.inertia_, 'centros': modelo.cluster_centers_}
+    silhueta = silhouette_score(amostra, modelo.labels_, sample_size=min(AMOSTRA_SILHUETA, len(amostra)),
+                                random_state=semente)
+    return {'k': k, 'silhueta': silhueta, 'inercia': modelo.inertia_, 'centros': modelo.cluster_centers_}
+
+
+def varrer_k(amostra, ks=KS_PADRAO, workers=None, semente=SEMENTE):
+    """Ajusta um modelo por k na amostra (em paralelo) e devolve a avaliação de cada um."""
+    distintos = len(np.unique(amostra, axis=0))
+    ks = [k for k in ks if 2 <= k < distintos]
+    workers = min(workers or os.cpu_count() or 1, len(ks))
+    if workers <= 1:
+        return [_avaliar_k(amostra, k, semente) for k in ks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_avaliar_k, [amostra] * len(ks), ks, [semente] * len(ks)))
+
+
+def treinar(blocos, centros, semente=SEMENTE):
+    """MiniBatchKMeans iniciado em `centros` e atualizado com partial_fit em lotes de cada bloco."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    modelo = MiniBatchKMeans(n_clusters=len(centros), init=centros, n_init=1, batch_size=TAMANHO_LOTE,
+                             random_state=semente)
+    for bloco in blocos():
+        x, completas = _features(bloco)
+        x = x[completas]
+        for inicio in range(0, len(x), TAMANHO_LOTE):
+            modelo.partial_fit(x[inicio:inicio + TAMANHO_LOTE])
+    return modelo
+
+
+def rotular(blocos, modelo, arquivo=ARQUIVO_SEGMENTOS):
+    """Grava o cluster de cada produto (-1 sem features completas) e devolve o resumo por cluster.
+
+    O arquivo é escrito bloco a bloco num temporário e só substitui o anterior quando completo;
+    com `arquivo` None só o resumo é calculado.
+    """
+    k = modelo.n_clusters
+    contagem, somas = np.zeros(k), {c: np.zeros(k) for c in COLUNAS_RESUMO}
+    with open(arquivo + '.tmp' if arquivo else os.devnull, 'w', encoding='utf-8', newline='') as saida:
+        for numero, bloco in enumerate(blocos()):
+            x, completas = _features(bloco)
+            rotulos = np.full(len(bloco), -1)
+            if completas.any():
+                rotulos[completas] = modelo.predict(x[completas])
+            if arquivo:
+                identificacao = bloco[[c for c in COLUNAS_IDENTIFICACAO if c in bloco.columns]]
+                identificacao.assign(Cluster=rotulos).to_csv(saida, header=numero == 0, index=False)
+
+            contagem += np.bincount(rotulos[completas], minlength=k)
+            for coluna in COLUNAS_RESUMO:
+                if coluna in bloco.columns:
+                    valores = np.nan_to_num(bloco[coluna].to_numpy(dtype='float64', na_value=np.nan))
+                    somas[coluna] += np.bincount(rotulos[completas], weights=valores[completas], minlength=k)
+    if arquivo:
+        os.replace(arquivo + '.tmp', arquivo)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resumo = pd.DataFrame({'Produtos': contagem.astype(np.int64),
+                               'Receita_Total': somas['Receita_Estimada'],
+                               'Participacao_Receita': somas['Receita_Estimada'] / somas['Receita_Estimada'].sum() * 100,
+                               'Nota_Media': somas['Nota'] / contagem,
+                               'Preco_Medio': somas['Preço'] / contagem},
+                              index=pd.RangeIndex(k, name='Cluster'))
+    centros = pd.DataFrame(modelo.cluster_centers_, columns=FEATURES, index=resumo.index)
+    return resumo.join(centros).sort_values('Receita_Total', ascending=False)
+
+
+def segmentar(blocos, ks=KS_PADRAO, workers=None, arquivo=ARQUIVO_SEGMENTOS, semente=SEMENTE):
+    """Amostra, varredura de k, treino mini-batch e rótulos; None se não houver linhas suficientes."""
+    amostra = amostrar(blocos, semente=semente)
+    avaliacoes = varrer_k(amostra, ks, workers, semente)
+    if not avaliacoes:
+        return None
+    melhor = max(avaliacoes, key=lambda a: a['silhueta'])
+    modelo = treinar(blocos, melhor['centros'], semente)
+    return {'k': melhor['k'], 'silhueta': melhor['silhueta'],
+            'varredura': pd.DataFrame(avaliacoes).drop(columns='centros').set_index('k'),
+            'resumo': rotular(blocos, modelo, arquivo)}
@@ -0,0 +1,121 @@
+"""Texto dos reviews: sentimento por léxico e frequência de termos para a nuvem de palavras.
+
+Cada coluna de review é convertida para minúsculas uma única vez e as ocorrências dos léxicos são
+contadas por produto, sem concatenar o corpus num texto único. O resultado são colunas por produto
+(positivos, negativos, score) que o motor de agregação soma por marca/material/temporada.
+
+As frequências de termos são contadas em lotes e mantidas num resumo top-K (space-saving) de
+tamanho fixo, mesclável entre blocos; a WordCloud recebe só essas frequências.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_REVIEWS = ['Review1', 'Review2', 'Review3']
+
+# Palavras positivas e negativas comuns em português
+PALAVRAS_POSITIVAS = ['bom', 'boa', 'excelente', 'ótimo', 'ótima', 'perfeito', 'perfeita',
+                      'confortável', 'qualidade', 'recomendo', 'amei', 'adorei',
+                      'maravilhoso', 'maravilhosa', 'maravilhosos', 'maravilhosas']
+PALAVRAS_NEGATIVAS = ['ruim', 'péssimo', 'péssima', 'horrível', 'pequeno', 'pequena',
+                      'apertado', 'rasgou', 'desbotou', 'falsificação', 'falso', 'problema']
+
+
+def compilar_lexico(palavras):
+    # Alternativas mais longas primeiro e \b nas pontas: "boa" não casa dentro de "boato"
+    alternativas = sorted((re.escape(p) for p in palavras), key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(alternativas) + r')\b')
+
+
+PADRAO_POSITIVO = compilar_lexico(PALAVRAS_POSITIVAS)
+PADRAO_NEGATIVO = compilar_lexico(PALAVRAS_NEGATIVAS)
+
+
+def pontuar_reviews(df, colunas=COLUNAS_REVIEWS):
+    """Contagem de termos positivos/negativos e score (pos - neg) / (pos + neg) por produto.
+
+    Devolve um DataFrame com o mesmo índice de `df`; produtos sem termos do léxico ficam com score NaN.
+    """
+    positivos = np.zeros(len(df))
+    negativos = np.zeros(len(df))
+    for coluna in colunas:
+        if coluna not in df.columns:
+            continue
+        texto = df[coluna].astype('string').fillna('').str.lower()
+        positivos += texto.str.count(PADRAO_POSITIVO).to_numpy(dtype='float64')
+        negativos += texto.str.count(PADRAO_NEGATIVO).to_numpy(dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        score = (positivos - negativos) / (positivos + negativos)
+    return pd.DataFrame({'Sentimento_Positivo': positivos,
+                         'Sentimento_Negativo': negativos,
+                         'Sentimento_Score': score}, index=df.index)
+
+
+def score_sentimento(positivos, negativos):
+    """Score agregado no intervalo [-1, 1] a partir de somas de termos (escalares ou Series)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (positivos - negativos) / (positivos + negativos)
+
+
+# ============================================================================
+# FREQUÊNCIA DE TERMOS (NUVEM DE PALAVRAS)
+# ============================================================================
+
+# Palavras de 2+ letras (sem dígitos nem sublinhado)
+PADRAO_TOKEN = re.compile(r'[^\W\d_]{2,}')
+
+STOPWORDS_PT = frozenset("""
+a ao aos aquela aquelas aquele aqueles aquilo as até com como da das de dela delas dele deles
+depois do dos e ela elas ele eles em entre era eram essa essas esse esses esta estas este estes
+estou está estão eu foi foram há isso isto já lhe lhes mais mas me mesmo meu meus minha minhas
+muito na nas nem no nos nossa nossas nosso nossos num numa não o os ou para pela pelas pelo pelos
+por pra qual quando que quem se sem ser seu seus sua suas só também te tem tinha to tu tua tuas
+um uma umas uns você vocês vou vai ter bem ficou fica veio pq porque q vc tá né ainda então sobre
+são sou nao pois assim mim
+""".split())
+
+CAPACIDADE_TERMOS = 1000
+LOTE_TERMOS = 50_000
+
+
+def novo_resumo_termos(capacidade=CAPACIDADE_TERMOS):
+    # `piso`: maior contagem possível de um termo fora do resumo (erro máximo do space-saving)
+    return {'capacidade': capacidade, 'contagens': {}, 'piso': 0}
+
+
+def contar_termos(textos):
+    """Frequência dos termos (sem stopwords) de uma Series de textos, vetorizada via findall/explode."""
+    tokens = textos.astype('string').dropna().str.lower().str.findall(PADRAO_TOKEN).explode()
+    contagens = tokens.value_counts()
+    return contagens[~contagens.index.isin(STOPWORDS_PT)]
+
+
+def mesclar_termos(resumo, contagens):
+    """Mescla contagens de um lote no resumo top-K (merge do space-saving).
+
+    Termos novos herdam o piso do resumo (superestimativa limitada); depois do merge só as
+    `capacidade` maiores contagens ficam, e o novo piso passa a ser a menor delas.
+    """
+    atuais = resumo['contagens']
+    for termo, contagem in contagens.items():
+        atuais[termo] = atuais.get(termo, resumo['piso']) + int(contagem)
+    if len(atuais) > resumo['capacidade']:
+        mantidos = sorted(atuais.items(), key=lambda item: item[1], reverse=True)[:resumo['capacidade']]
+        resumo['contagens'] = dict(mantidos)
+        resumo['piso'] = mantidos[-1][1]
+    return resumo
+
+
+def atualizar_termos(resumo, bloco, colunas=COLUNAS_REVIEWS, lote=LOTE_TERMOS):
+    """Conta os termos de todas as colunas de review do bloco, em lotes de `lote` linhas."""
+    colunas = [c for c in colunas if c in bloco.columns]
+    for inicio in range(0, len(bloco), lote):
+        parte = bloco.iloc[inicio:inicio + lote]
+        for coluna in colunas:
+            mesclar_termos(resumo, contar_termos(parte[coluna]))
+    return resumo
+
+
+def termos_mais_frequentes(resumo, n=100):
+    return dict(sorted(resumo['contagens'].items(), key=lambda item: item[1], reverse=True)[:n])
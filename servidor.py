@@ -0,0 +1,429 @@
+"""Servidor local da análise: o dataset fica carregado em memória e as perguntas viram consultas JSON.
+
+O dataset limpo é lido uma vez (cópia colunar), com o sentimento já pontuado, e a agregação de cada
+combinação de filtros é calculada uma vez e guardada (LRU): consultas repetidas saem em
+milissegundos. Os gráficos são desenhados sob demanda num pool de processos. Um vigia confere o
+CSV periodicamente: linhas acrescentadas ao fim são lidas sozinhas e somadas ao que já está em
+memória; qualquer outra mudança recarrega tudo.
+
+    python servidor.py                           # http://127.0.0.1:8765
+    python servidor.py --socket /tmp/analise.sock
+
+Rotas (GET; todas aceitam filtros na query string, ex. ?Marca=lupo,zorba&Preço_max=200):
+    /saude                     linhas carregadas, versão dos dados e recargas
+    /marcas?top=10             ranking de marcas por receita
+    /abc                       produtos por classe ABC
+    /sweet-spot                faixa de preço de maior receita
+    /sentimento                menções positivas e negativas nos reviews
+    /perguntas/<n>             insights de uma pergunta da análise
+    /graficos/<n>              desenha os gráficos da pergunta e devolve os caminhos dos PNGs
+
+Filtros: colunas categóricas por igualdade (valores separados por vírgula) e numéricas por faixa
+(<coluna>_min, <coluna>_max).
+"""
+import argparse
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import analise_estrategica_ecommerce as analise
+from agregacao import agregar, assinatura_final, tabelas_por_grupo, estatisticas_globais
+from carregamento import ARQUIVO_LIMPO, colunas_necessarias, fim_linhas_completas, ler_em_blocos
+from classificacao_abc import CLASSES, classificar_abc, contar_classes
+from colunar import carregar_colunar
+from sentimento import COLUNAS_REVIEWS, pontuar_reviews
+
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8765
+# Segundos entre verificações do CSV (mudou de tamanho ou de mtime -> recarga)
+INTERVALO_VERIFICACAO = 2.0
+# Tentativas de carga completa enquanto o CSV continua mudando durante a leitura
+TENTATIVAS_CARGA = 5
+# Combinações de filtros com agregação guardada em memória
+LIMITE_CONSULTAS = 64
+DIRETORIO_GRAFICOS = 'graficos_servidor'
+# Gênero não entra em nenhuma pergunta, mas é um filtro natural
+COLUNAS_FILTRO = ['Gênero']
+
+
+class ErroConsulta(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _json(objeto):
+    """Converte tipos numpy/pandas para JSON (NaN vira null)."""
+    if isinstance(objeto, dict):
+        return {str(chave): _json(valor) for chave, valor in objeto.items()}
+    if isinstance(objeto, (list, tuple)):
+        return [_json(valor) for valor in objeto]
+    if isinstance(objeto, (float, np.floating)):
+        return None if np.isnan(objeto) else float(objeto)
+    if isinstance(objeto, np.integer):
+        return int(objeto)
+    if isinstance(objeto, (str, int, bool)) or objeto is None:
+        return objeto
+    return str(objeto)
+
+
+def _registros(tabela, nome_indice):
+    return _json(tabela.reset_index().rename(columns={tabela.index.name or 'index': nome_indice})
+                 .to_dict(orient='records'))
+
+
+def _estado_arquivo(caminho):
+    info = os.stat(caminho)
+    return {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def _com_sentimento(df):
+    if any(coluna in df.columns for coluna in COLUNAS_REVIEWS):
+        return df.join(pontuar_reviews(df))
+    return df
+
+
+def _concatenar(df, novas):
+    # Categóricas com a união ordenada das categorias dos dois lados, para continuarem categóricas.
+    # As colunas são trocadas em cópias rasas: consultas em andamento seguem com o df antigo intacto
+    df, novas = df.copy(deep=False), novas.copy(deep=False)
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            categorias = df[coluna].cat.categories.union(novas[coluna].astype('category').cat.categories)
+            df[coluna] = df[coluna].cat.set_categories(categorias)
+            novas[coluna] = pd.Categorical(novas[coluna], categories=categorias)
+    return pd.concat([df, novas[df.columns]], ignore_index=True)
+
+
+class Analise:
+    """Dataset em memória, agregações por filtro (LRU) e recarga incremental do CSV."""
+
+    def __init__(self, caminho=ARQUIVO_LIMPO):
+        self.caminho = caminho
+        self.colunas = list(dict.fromkeys(colunas_necessarias(None) + COLUNAS_FILTRO))
+        self.versao, self.recargas = 0, 0
+        self._trava = threading.Lock()
+        self._contextos = OrderedDict()
+        # As perguntas rodam dentro das consultas: sem pools aninhados e sem gravar as exportações da
+        # análise no diretório atual (o servidor só devolve os resultados)
+        analise.WORKERS_SEGMENTOS = analise.WORKERS_ELASTICIDADE = 1
+        analise.EXPORTAR_ARQUIVOS = False
+        self._carregar()
+        # Gráficos de execuções anteriores podem ser de outros dados com a mesma chave (versão 0)
+        self._limpar_graficos()
+
+    def _carregar(self):
+        # Se o CSV mudar durante a leitura a carga é refeita, para a origem corresponder ao que foi lido
+        for _ in range(TENTATIVAS_CARGA):
+            arquivo = _estado_arquivo(self.caminho)
+            fim = fim_linhas_completas(self.caminho, arquivo['tamanho'])
+            if fim == arquivo['tamanho']:
+                df = carregar_colunar(self.caminho, colunas=self.colunas)
+            else:
+                # Linha pela metade no fim: a cópia colunar a incluiria, então o CSV é lido até a última
+                # linha completa e o resto entra na próxima verificação, como no acréscimo
+                df = functools.reduce(_concatenar, ler_em_blocos(self.caminho, colunas=self.colunas, fim=fim))
+            if _estado_arquivo(self.caminho) == arquivo:
+                break
+        else:
+            raise RuntimeError(f"{self.caminho} mudou durante as {TENTATIVAS_CARGA} tentativas de carga")
+        self.df = _com_sentimento(df)
+        self.origem = dict(arquivo, bytes=fim, assinatura=assinatura_final(self.caminho, fim))
+        self.carregado_em = time.time()
+
+    def recarregar_se_mudou(self):
+        """Incorpora as mudanças do CSV; devolve quantas linhas novas entraram (None se nada mudou)."""
+        arquivo = _estado_arquivo(self.caminho)
+        if arquivo['tamanho'] == self.origem['tamanho'] and arquivo['mtime_ns'] == self.origem['mtime_ns']:
+            return None
+        with self._trava:
+            linhas_antes = len(self.df)
+            acrescido = (arquivo['tamanho'] > self.origem['bytes'] and
+                         assinatura_final(self.caminho, self.origem['bytes']) == self.origem['assinatura'])
+            if acrescido:
+                # Só as linhas completas acrescentadas são lidas (uma linha ainda sendo escrita fica para
+                # a próxima verificação): mesmo caminho do modo incremental da agregação
+                fim = fim_linhas_completas(self.caminho, arquivo['tamanho'])
+                self.origem.update(arquivo)
+                if fim <= self.origem['bytes']:
+                    return None
+                blocos = list(ler_em_blocos(self.caminho, colunas=self.colunas, inicio=self.origem['bytes'], fim=fim))
+                if blocos:
+                    self.df = _concatenar(self.df, _com_sentimento(pd.concat(blocos, ignore_index=True)))
+                self.origem.update(bytes=fim, assinatura=assinatura_final(self.caminho, fim))
+                self.carregado_em = time.time()
+            else:
+                self._carregar()
+            self.versao += 1
+            self.recargas += 1
+            self._contextos.clear()
+        self._limpar_graficos()
+        return len(self.df) - linhas_antes if acrescido else len(self.df)
+
+    def filtrar(self, filtros, df=None):
+        df = self.df if df is None else df
+        mascara = np.ones(len(df), dtype=bool)
+        for nome, valor in filtros.items():
+            coluna, limite = nome[:-4], nome[-4:]
+            if limite in ('_min', '_max') and coluna in df.columns and \
+                    pd.api.types.is_numeric_dtype(df[coluna]):
+                try:
+                    valor = float(valor)
+                except ValueError:
+                    raise ErroConsulta(400, f"valor numérico inválido para {nome}: {valor!r}")
+                valores = df[coluna].to_numpy(dtype='float64', na_value=np.nan)
+                mascara &= valores >= valor if limite == '_min' else valores <= valor
+            elif nome in df.columns and isinstance(df[nome].dtype, pd.CategoricalDtype):
+                mascara &= df[nome].isin(valor.split(',')).to_numpy()
+            else:
+                raise ErroConsulta(400, f"filtro desconhecido: {nome}")
+        if not mascara.any():
+            raise ErroConsulta(404, "nenhum produto com esses filtros")
+        return df if mascara.all() else df[mascara].reset_index(drop=True)
+
+    def contexto(self, filtros):
+        """df filtrado, estado agregado, tabelas, globais e resultados de perguntas já calculados."""
+        chave = tuple(sorted(filtros.items()))
+        with self._trava:
+            if chave in self._contextos:
+                self._contextos.move_to_end(chave)
+                return self._contextos[chave]
+            df, versao = self.df, self.versao
+        # A agregação roda fora da trava global: consultas a outros filtros não esperam por ela
+        df = self.filtrar(filtros, df)
+        faixas = {'Faixa_Preço_Detalhada': pd.cut(df['Preço'], bins=analise.NUM_FAIXAS_PRECO)}
+        estado = agregar(df, faixas)
+        contexto = {'df': df, 'estado': estado, 'tabelas': tabelas_por_grupo(estado, analise.NUM_FAIXAS_PRECO),
+                    'globais': estatisticas_globais(estado), 'perguntas': {}, 'trava': threading.Lock(),
+                    'chave': hashlib.sha256(repr((versao, chave)).encode()).hexdigest()[:16]}
+        with self._trava:
+            if versao != self.versao:
+                # Os dados mudaram durante a agregação: responde com o que foi calculado, sem guardar
+                return contexto
+            contexto = self._contextos.setdefault(chave, contexto)
+            self._contextos.move_to_end(chave)
+            descartados = max(0, len(self._contextos) - LIMITE_CONSULTAS)
+            for _ in range(descartados):
+                self._contextos.popitem(last=False)
+        if descartados:
+            self._limpar_graficos()
+        return contexto
+
+    def _limpar_graficos(self):
+        """Apaga de graficos_servidor/ os diretórios de consultas fora da memória (versões antigas, LRU)."""
+        with self._trava:
+            ativos = {contexto['chave'] for contexto in self._contextos.values()}
+        if not os.path.isdir(DIRETORIO_GRAFICOS):
+            return
+        for nome in os.listdir(DIRETORIO_GRAFICOS):
+            if nome not in ativos:
+                shutil.rmtree(os.path.join(DIRETORIO_GRAFICOS, nome), ignore_errors=True)
+
+    def pergunta(self, numero, filtros):
+        contexto = self.contexto(filtros)
+        # Trava da própria consulta: a mesma pergunta não é calculada duas vezes, as demais seguem
+        with contexto['trava']:
+            if numero not in contexto['perguntas']:
+                contexto['perguntas'][numero] = analise.PERGUNTAS[numero][1](
+                    contexto['df'], contexto['estado'], contexto['tabelas'], contexto['globais'])
+        return contexto['perguntas'][numero]
+
+    # ------------------------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------------------------
+
+    def saude(self, filtros):
+        return {'arquivo': self.caminho, 'linhas': len(self.df), 'versao': self.versao, 'recargas': self.recargas,
+                'carregado_em': self.carregado_em, 'consultas_em_memoria': len(self._contextos)}
+
+    def marcas(self, filtros):
+        try:
+            top = int(filtros.pop('top', 10))
+        except ValueError:
+            raise ErroConsulta(400, "top deve ser um número inteiro")
+        ranking = self.contexto(filtros)['tabelas']['Marca'].sort_values('Receita_Estimada', ascending=False)
+        return {'marcas': _registros(ranking.head(top), 'Marca'), 'total_marcas': len(ranking)}
+
+    def abc(self, filtros):
+        receita = self.contexto(filtros)['df']['Receita_Estimada'].to_numpy(dtype='float64', na_value=0.0)
+        contagem = contar_classes(classificar_abc(receita))
+        return {'classes': dict(zip(CLASSES.tolist(), contagem.tolist())),
+                'percentual_a': contagem[0] / max(contagem.sum(), 1) * 100}
+
+    def sweet_spot(self, filtros):
+        faixas = self.contexto(filtros)['tabelas']['Faixa_Preço_Detalhada']
+        faixas = faixas[['Qtd_Vendidos_Numeric', 'Receita_Estimada', 'Produtos']]
+        return {'faixa_ideal': str(faixas['Receita_Estimada'].idxmax()),
+                'faixas': _registros(faixas.rename(index=str), 'Faixa_Preço')}
+
+    def sentimento(self, filtros):
+        globais = self.contexto(filtros)['globais']
+        if 'Sentimento_Positivo' not in globais:
+            raise ErroConsulta(404, "reviews indisponíveis no dataset")
+        positivos, negativos = globais['Sentimento_Positivo']['soma'], globais['Sentimento_Negativo']['soma']
+        total = positivos + negativos
+        return {'positivos': int(positivos), 'negativos': int(negativos),
+                'percentual_positivo': positivos / total * 100 if total else np.nan}
+
+    def insights(self, numero, filtros):
+        return {'pergunta': numero, 'titulo': analise.PERGUNTAS[numero][0],
+                'insights': self.pergunta(numero, filtros)['insights']}
+
+    def specs_graficos(self, numero, filtros):
+        """Specs da pergunta com os arquivos em graficos_servidor/<versão+filtros>/ (só os que faltam)."""
+        diretorio = os.path.abspath(os.path.join(DIRETORIO_GRAFICOS, self.contexto(filtros)['chave']))
+        os.makedirs(diretorio, exist_ok=True)
+        specs = []
+        for spec in self.pergunta(numero, filtros)['graficos']:
+            spec = copy.copy(spec)
+            spec['arquivo'] = os.path.join(diretorio, spec['arquivo'])
+            specs.append(spec)
+        return specs
+
+
+def _numero_pergunta(texto):
+    try:
+        numero = int(texto)
+    except ValueError:
+        numero = None
+    if numero not in analise.PERGUNTAS:
+        raise ErroConsulta(404, f"pergunta inexistente: {texto} (use 1 a {len(analise.PERGUNTAS)})")
+    return numero
+
+
+class Servidor:
+    """Roteamento das consultas e servidor HTTP mínimo sobre asyncio (TCP ou socket Unix)."""
+
+    def __init__(self, analise_memoria, workers=None):
+        self.analise = analise_memoria
+        self.workers = workers
+        self._pool = None
+
+    async def consultar(self, caminho):
+        """(status, corpo) de uma consulta 'rota?filtros' — usável sem rede."""
+        partes = urlsplit(caminho)
+        rota = [unquote(parte) for parte in partes.path.strip('/').split('/') if parte]
+        filtros = dict(parse_qsl(partes.query))
+        consultas = {'saude': self.analise.saude, 'marcas': self.analise.marcas, 'abc': self.analise.abc,
+                     'sweet-spot': self.analise.sweet_spot, 'sentimento': self.analise.sentimento}
+        inicio = time.perf_counter()
+        try:
+            if len(rota) == 1 and rota[0] in consultas:
+                corpo = await asyncio.to_thread(consultas[rota[0]], filtros)
+            elif len(rota) == 2 and rota[0] == 'perguntas':
+                corpo = await asyncio.to_thread(self.analise.insights, _numero_pergunta(rota[1]), filtros)
+            elif len(rota) == 2 and rota[0] == 'graficos':
+                corpo = await self.graficos(_numero_pergunta(rota[1]), filtros)
+            else:
+                raise ErroConsulta(404, f"rota desconhecida: /{'/'.join(rota)}")
+            status = 200
+        except ErroConsulta as erro:
+            status, corpo = erro.status, {'erro': str(erro)}
+        except Exception as erro:
+            status, corpo = 500, {'erro': f'{type(erro).__name__}: {erro}'}
+        corpo['milissegundos'] = (time.perf_counter() - inicio) * 1000
+        return status, _json(corpo)
+
+    async def graficos(self, numero, filtros):
+        # Importado só aqui: o servidor não carrega matplotlib enquanto nenhum gráfico é pedido
+        import graficos as modulo_graficos
+
+        specs = await asyncio.to_thread(self.analise.specs_graficos, numero, filtros)
+        pendentes = [spec for spec in specs if not os.path.exists(spec['arquivo'])]
+        if pendentes and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers or modulo_graficos.WORKERS_PADRAO,
+                                             initializer=modulo_graficos.configurar_estilo)
+        loop = asyncio.get_running_loop()
+        resultados = await asyncio.gather(*[loop.run_in_executor(self._pool, modulo_graficos.renderizar, spec)
+                                            for spec in pendentes], return_exceptions=True)
+        erros = {spec['arquivo']: f'{type(r).__name__}: {r}'
+                 for spec, r in zip(pendentes, resultados) if isinstance(r, Exception)}
+        return {'pergunta': numero, 'arquivos': [s['arquivo'] for s in specs if s['arquivo'] not in erros],
+                'desenhados': len(pendentes) - len(erros), 'erros': erros}
+
+    async def _atender(self, leitor, escritor):
+        try:
+            # Aceita tanto URLs codificadas (%C3%AA) quanto UTF-8 cru na linha de requisição
+            linha = (await leitor.readline()).decode('utf-8', errors='replace').split()
+            while (await leitor.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            if len(linha) < 2:
+                status, corpo = 400, {'erro': 'requisição inválida'}
+            elif linha[0] != 'GET':
+                status, corpo = 405, {'erro': f'método não suportado: {linha[0]}'}
+            else:
+                status, corpo = await self.consultar(linha[1])
+            dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+            escritor.write(f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+                           f'Content-Type: application/json; charset=utf-8\r\n'
+                           f'Content-Length: {len(dados)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + dados)
+            await escritor.drain()
+        finally:
+            escritor.close()
+
+    async def _vigiar(self, intervalo):
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                linhas = await asyncio.to_thread(self.analise.recarregar_se_mudou)
+            except Exception as erro:
+                print(f"  AVISO: recarga de {self.analise.caminho} falhou ({erro})")
+                continue
+            if linhas is not None:
+                print(f"♻️ {self.analise.caminho} mudou: {linhas} linhas incorporadas "
+                      f"({len(self.analise.df)} no total, versão {self.analise.versao})")
+
+    async def servir(self, host=HOST_PADRAO, porta=PORTA_PADRAO, socket=None, intervalo=INTERVALO_VERIFICACAO):
+        if socket:
+            servidor = await asyncio.start_unix_server(self._atender, path=socket)
+            endereco = socket
+        else:
+            servidor = await asyncio.start_server(self._atender, host, porta)
+            endereco = 'http://%s:%d' % servidor.sockets[0].getsockname()[:2]
+        print(f"🚀 Servindo {len(self.analise.df)} produtos em {endereco}")
+        vigia = asyncio.create_task(self._vigiar(intervalo))
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            vigia.cancel()
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dados', default=ARQUIVO_LIMPO, help='CSV limpo servido (padrão: %(default)s)')
+    parser.add_argument('--host', default=HOST_PADRAO)
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help='0 escolhe uma porta livre')
+    parser.add_argument('--socket', help='serve num socket Unix em vez de TCP')
+    parser.add_argument('--workers', type=int, default=None, help='processos para desenhar os gráficos')
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_VERIFICACAO,
+                        help='segundos entre verificações do CSV (padrão: %(default)s)')
+    args = parser.parse_args(argumentos)
+
+    comeco = time.perf_counter()
+    servidor = Servidor(Analise(args.dados), args.workers)
+    servidor.analise.contexto({})
+    print(f"✓ {len(servidor.analise.df)} linhas carregadas e agregadas em {time.perf_counter() - comeco:.2f}s")
+    try:
+        asyncio.run(servidor.servir(args.host, args.porta, args.socket, args.intervalo))
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Telemetria da execução: spans nomeados por etapa (perguntas, gráficos, relatório).
+
+Cada span guarda início, duração, linhas processadas, variação de RSS e o tamanho dos arquivos que
+a etapa gerou. Os spans podem ser exportados como JSON lines (um registro por linha) ou como trace
+do Chrome (chrome://tracing, Perfetto). Com `perfilar=True` cada span roda sob o cProfile e o
+perfil é salvo em `diretorio_perfis/<span>.prof` (abrir com pstats ou snakeviz).
+"""
+import contextlib
+import cProfile
+import json
+import os
+import resource
+import threading
+import time
+
+DIRETORIO_PERFIS = 'perfis'
+
+
+def rss_atual():
+    """RSS do processo em bytes: /proc/self/statm (Linux); fora dele, o pico via getrusage."""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def tamanho_arquivos(arquivos):
+    return sum(os.path.getsize(a) for a in arquivos if os.path.exists(a))
+
+
+class Telemetria:
+    """Coleta os spans de uma execução."""
+
+    def __init__(self, perfilar=False, diretorio_perfis=DIRETORIO_PERFIS):
+        self.perfilar = perfilar
+        self.diretorio_perfis = diretorio_perfis
+        self.spans = []
+        self._origem = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, nome, linhas=None, arquivos=()):
+        """Mede o bloco; `arquivos` são as saídas da etapa, medidas ao final dele."""
+        registro = {'nome': nome, 'linhas': linhas, 'pid': os.getpid(), 'tid': threading.get_ident()}
+        perfil = cProfile.Profile() if self.perfilar else None
+        rss_inicial = rss_atual()
+        registro['inicio'] = time.perf_counter() - self._origem
+        if perfil:
+            perfil.enable()
+        try:
+            yield registro
+        except Exception as erro:
+            registro['erro'] = f'{type(erro).__name__}: {erro}'
+            raise
+        finally:
+            if perfil:
+                perfil.disable()
+            registro['duracao'] = time.perf_counter() - self._origem - registro['inicio']
+            registro['delta_rss_mb'] = (rss_atual() - rss_inicial) / 2 ** 20
+            registro['bytes_saida'] = tamanho_arquivos(arquivos)
+            if perfil:
+                os.makedirs(self.diretorio_perfis, exist_ok=True)
+                registro['perfil'] = os.path.join(self.diretorio_perfis, f'{nome}.prof')
+                perfil.dump_stats(registro['perfil'])
+            self.spans.append(registro)
+
+    def registrar_saida(self, nome, arquivos):
+        """Soma ao span `nome` o tamanho de arquivos gerados depois dele (ex.: gráficos renderizados em lote)."""
+        for registro in self.spans:
+            if registro['nome'] == nome:
+                registro['bytes_saida'] += tamanho_arquivos(arquivos)
+
+    def exportar_jsonl(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            for registro in self.spans:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def exportar_chrome_trace(self, caminho):
+        """Formato Trace Event: um evento completo ('X') por span, tempos em microssegundos."""
+        eventos = [{'name': r['nome'], 'cat': 'analise', 'ph': 'X', 'pid': r['pid'], 'tid': r['tid'],
+                    'ts': r['inicio'] * 1e6, 'dur': r['duracao'] * 1e6,
+                    'args': {chave: valor for chave, valor in r.items()
+                             if chave not in ('nome', 'pid', 'tid', 'inicio', 'duracao')}}
+                   for r in self.spans]
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, arquivo, ensure_ascii=False)
+
+    def exportar(self, caminho):
+        """Exporta pelo formato da extensão: `.jsonl` para JSON lines, qualquer outra para trace do Chrome."""
+        if caminho.endswith('.jsonl'):
+            self.exportar_jsonl(caminho)
+        else:
+            self.exportar_chrome_trace(caminho)